@@ -3,10 +3,9 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional
 import jwt
 
-from backend.storage.user_manager import user_manager
+from backend.storage.user_manager import user_store
 from backend.core.auth_utils import (
-    verify_password, 
-    get_password_hash, 
+    password_hasher,
     create_access_token, 
     create_refresh_token, 
     get_current_user,
@@ -35,11 +34,11 @@ class RefreshTokenRequest(BaseModel):
 
 @router.post("/signup")
 async def signup(user: UserSignup):
-    if user_manager.get_user_by_username(user.username):
+    if await user_store.get_user_by_username(user.username):
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = get_password_hash(user.password)
-    user_manager.create_user(
+    hashed_password = await password_hasher.hash(user.password)
+    await user_store.create_user(
         username=user.username,
         email=user.email,
         password_hash=hashed_password,
@@ -49,9 +48,9 @@ async def signup(user: UserSignup):
 
 @router.post("/login", response_model=Token)
 async def login(credentials: UserLogin):
-    user = user_manager.get_user_by_username(credentials.username)
+    user = await user_store.get_user_by_username(credentials.username)
     
-    if not user or not verify_password(credentials.password, user["password_hash"]):
+    if not user or not await password_hasher.verify(credentials.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -83,7 +82,7 @@ async def refresh(request: RefreshTokenRequest):
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
             
-        user = user_manager.get_user_by_username(username)
+        user = await user_store.get_user_by_username(username)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
             
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from backend.orchestrator.agent import orchestrator
+from fastapi import APIRouter, Depends, HTTPException
+from backend.orchestrator.jobs import jobs_store
+from backend.core.logger import stream_logger
 from pydantic import BaseModel
 from backend.core.auth_utils import get_current_user
-from backend.storage.workspace_manager import workspace_manager
+from backend.storage.workspace_manager import workspace_store
 
 router = APIRouter(prefix="/api/orchestrator", tags=["orchestrator"])
 
@@ -10,9 +11,9 @@ class OrchestrationRequest(BaseModel):
     workspace_id: str
 
 @router.post("/start")
-async def start_orchestration(req: OrchestrationRequest, background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
+async def start_orchestration(req: OrchestrationRequest, current_user: dict = Depends(get_current_user)):
     # Verify workspace belongs to user OR is anonymous (allow claiming)
-    ws = workspace_manager.get_workspace(req.workspace_id)
+    ws = await workspace_store.get_workspace(req.workspace_id)
     if not ws:
         raise HTTPException(status_code=404, detail="Workspace not found")
         
@@ -22,8 +23,28 @@ async def start_orchestration(req: OrchestrationRequest, background_tasks: Backg
     
     # If the workspace is anonymous, claim it for the current user
     if not owner_id:
-        workspace_manager.update_workspace(req.workspace_id, {"user_id": current_user["username"]})
+        await workspace_store.update_workspace(req.workspace_id, {"user_id": current_user["username"]})
     
-    # Kick off the robust Planner Agent in the background
-    background_tasks.add_task(orchestrator.run_planner, req.workspace_id)
-    return {"status": "started", "workspace_id": req.workspace_id}
+    # Queue the robust Planner Agent; a job worker picks it up and checkpoints its progress
+    job = await jobs_store.enqueue(req.workspace_id)
+    # Reset a finished stream now so clients connecting before the worker starts wait for the new run
+    await stream_logger.open_session(req.workspace_id)
+    return {"status": "started", "workspace_id": req.workspace_id, "job_id": job["id"], "job_state": job["state"]}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    job = await jobs_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    ws = await workspace_store.get_workspace(job["workspace_id"])
+    if ws and ws.get("user_id") and ws.get("user_id") != current_user["username"]:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    return {
+        "job_id": job["id"],
+        "workspace_id": job["workspace_id"],
+        "state": job["state"],
+        "attempts": job["attempts"],
+        "error": job["error"]
+    }
@@ -1,82 +1,237 @@
-import os
+import json
+import hashlib
 import asyncio
-from fastapi import APIRouter, Depends
+import logging
+from typing import Any, AsyncGenerator, Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from backend.models.synthesis import SynthesisResponse
-from backend.llm.gemini import GeminiProvider
-from backend.llm.anthropic_provider import AnthropicProvider
-from backend.llm.openai_provider import OpenAIProvider
-from backend.storage.profile_manager import profile_manager
-from backend.storage.workspace_manager import workspace_manager
-from backend.storage.knowledgebase import knowledge_base
+from backend.llm.registry import provider_registry
+from backend.llm.usage import prompt_usage
+from backend.llm.context import estimate_tokens, pack_context, prompt_budget
+from backend.llm.prompts import prompt_registry, render_domain_deep_dive, render_synthesis
+from backend.storage.profile_manager import profile_store
+from backend.storage.workspace_manager import workspace_store
+from backend.storage.knowledgebase import knowledge_store
 
 from backend.core.auth_utils import get_current_user
+from backend.core.config import settings
+from backend.core.deadline import cancel_on_disconnect, deadline_scope, stage_budget
+from backend.core.singleflight import SingleFlight, StreamFlight
 
 class DomainDeepDive(BaseModel):
     deep_dive_markdown: str
 
 router = APIRouter(prefix="/api/synthesis", tags=["synthesis"])
+logger = logging.getLogger(__name__)
+synthesis_flight = SingleFlight()
+synthesis_stream_flight = StreamFlight()
 
-@router.get("/{workspace_id}", response_model=SynthesisResponse)
-async def synthesize_results(workspace_id: str, current_user: dict = Depends(get_current_user)):
+def _fingerprint(inputs: dict) -> str:
+    """Stable hash of everything a synthesis result depends on."""
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _build_messages(kind: str, label: str, system_content: str, user_prefix: str, chunks: List[str], user_suffix: str, budget: int, separator: str = "\n") -> List[dict]:
+    """Packs ranked context chunks into whatever budget the fixed prompt text leaves over.
+    The prompt's size is recorded under `kind` for /metrics.
+    """
+    fixed_tokens = estimate_tokens(system_content) + estimate_tokens(user_prefix) + estimate_tokens(user_suffix)
+    packed = pack_context(chunks, max(0, budget - fixed_tokens), separator=separator)
+    prompt_usage.record(kind, fixed_tokens + packed.tokens, packed.tokens, packed.included, packed.truncated, packed.dropped)
+    logger.info(
+        "%s prompt: %d tokens (context %d; %d chunks included, %d truncated, %d dropped)",
+        label, fixed_tokens + packed.tokens, packed.tokens, packed.included, packed.truncated, packed.dropped
+    )
+    return [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": f"{user_prefix}{packed.text}{user_suffix}"}
+    ]
+
+async def _get_authorized_workspace(workspace_id: str, current_user: dict) -> dict:
     # Verify workspace belongs to user OR is anonymous
-    ws = workspace_manager.get_workspace(workspace_id)
+    ws = await workspace_store.get_workspace(workspace_id)
     if not ws:
-         from fastapi import HTTPException
          raise HTTPException(status_code=404, detail="Workspace not found")
          
     owner_id = ws.get("user_id")
     if owner_id and owner_id != current_user["username"]:
-         from fastapi import HTTPException
          raise HTTPException(status_code=403, detail="Unauthorized")
-         
-    # 1. Fetch ALL scraped/searched data from FTS5
-    docs = knowledge_base.search(f"{workspace_id}*", limit=20)
-    data_context = "\n".join([d.get('content', '') for d in docs])
+    return ws
+
+@router.get("/{workspace_id}", response_model=SynthesisResponse)
+async def synthesize_results(workspace_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    ws = await _get_authorized_workspace(workspace_id, current_user)
+
+    with deadline_scope(settings.SYNTHESIS_DEADLINE_SECONDS):
+        # Concurrent requests for the same workspace and user share one pipeline run,
+        # which is cancelled once every client waiting on it has disconnected
+        return await cancel_on_disconnect(request, synthesis_flight.do(
+            (workspace_id, current_user["username"]),
+            lambda: _run_synthesis(workspace_id, ws, current_user["username"])
+        ))
+
+@router.get("/{workspace_id}/stream")
+async def stream_synthesis(workspace_id: str, current_user: dict = Depends(get_current_user)):
+    """NDJSON stream of the synthesis pipeline.
+
+    Emits a `deep_dive` line per domain as soon as it is ready, `synthesis_partial`
+    lines while the final report is generated, then one `synthesis` line with the
+    complete SynthesisResponse (or an `error` line). Concurrent streams for the
+    same workspace and user share one pipeline run; a late joiner first replays
+    the lines sent so far.
+    """
+    ws = await _get_authorized_workspace(workspace_id, current_user)
+
+    async def ndjson():
+        try:
+            with deadline_scope(settings.SYNTHESIS_DEADLINE_SECONDS):
+                events = synthesis_stream_flight.stream(
+                    (workspace_id, current_user["username"]),
+                    lambda: _synthesis_events(workspace_id, ws, current_user["username"], stream_final=True)
+                )
+                async for event in events:
+                    if isinstance(event.get("synthesis"), BaseModel):
+                        event = {**event, "synthesis": event["synthesis"].model_dump(mode="json")}
+                    yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.exception("Streaming synthesis failed for workspace %s", workspace_id)
+            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+async def _run_synthesis(workspace_id: str, ws: dict, username: str) -> SynthesisResponse:
+    response = None
+    async for event in _synthesis_events(workspace_id, ws, username):
+        if event["type"] == "synthesis":
+            response = event["synthesis"]
+    return response
+
+async def _synthesis_events(workspace_id: str, ws: dict, username: str, stream_final: bool = False) -> AsyncGenerator[Dict[str, Any], None]:
+    """Runs the synthesis pipeline, yielding progress events as results become available.
+
+    The last event is always {"type": "synthesis", "synthesis": SynthesisResponse}.
+    """
+    # 1. Retrieve the top-ranked FTS5 documents for each domain
     domains = ws.get("domains", []) if ws else []
+    async with asyncio.TaskGroup() as group:
+        retrievals = [
+            group.create_task(knowledge_store.retrieve(
+                workspace_id,
+                domain.get("domain_id"),
+                [q.get("query", "") for q in domain.get("search_queries", [])],
+                limit=settings.RETRIEVAL_TOP_K
+            ))
+            for domain in domains
+        ]
+    domain_docs = [task.result() for task in retrievals]
+    # Without domains the final synthesis reads the workspace documents directly
+    docs = [] if domains else await knowledge_store.retrieve(workspace_id, None, [ws.get("user_query", "")], limit=settings.RETRIEVAL_TOP_K)
+    data_context = "\n".join([d.get('content', '') for d in docs])
     
-    # 2b. Instantiate the correct LLM from synthesis_model
+    # 2. Resolve the synthesis model and its per-prompt token budget
     model_id = ws.get("synthesis_model", "claude-sonnet-4-6") if ws else "claude-sonnet-4-6"
-    if "claude" in model_id.lower():
-        llm = AnthropicProvider(model_name=model_id)
-    elif "gpt" in model_id.lower() or "o1" in model_id.lower() or "o3" in model_id.lower():
-        llm = OpenAIProvider(model_name=model_id)
-    else:
-        llm = GeminiProvider(model_name=model_id)
+    budget = prompt_budget(model_id, settings.CONTEXT_MAX_PROMPT_TOKENS)
 
     # 3. Fetch Profile Persona
-    profile = profile_manager.load_profile(current_user["username"])
+    profile = await profile_store.load_profile(username)
     profile_summary = profile.get("body", "Generic User") if profile else "Generic User"
     
-    # 4. Perform Parallel Deep-Dives per domain
-    deep_dive_prompt_path = os.path.join(os.path.dirname(__file__), "../prompts/domain_deep_dive.md")
-    with open(deep_dive_prompt_path, "r") as f:
-        deep_dive_system_prompt = f.read()
+    # 4. Fingerprint each domain's deep-dive inputs, keyed on the prompt versions
+    deep_dive_version = prompt_registry.get("domain_deep_dive").version
+    synthesis_version = prompt_registry.get("synthesis").version
+
+    domain_fingerprints = [
+        _fingerprint({
+            "domain": domain,
+            "document_ids": [d.get("id") for d in documents],
+            "profile": profile_summary,
+            "model_id": model_id,
+            "context_budget": budget,
+            "prompt_version": deep_dive_version,
+        })
+        for domain, documents in zip(domains, domain_docs)
+    ]
+
+    # The final merge depends only on the deep dives, so their fingerprints stand in for them
+    fingerprint = _fingerprint({
+        "deep_dives": domain_fingerprints,
+        "document_ids": [d.get("id") for d in docs],
+        "profile": profile_summary,
+        "model_id": model_id,
+        "context_budget": budget,
+        "prompt_version": synthesis_version,
+    })
+    cached = await workspace_store.get_synthesis(workspace_id, fingerprint)
+    if cached:
+        yield {"type": "synthesis", "cached": True, "synthesis": SynthesisResponse.model_validate_json(cached)}
+        return
+
+    # 5. Resolve the shared provider for synthesis_model
+    llm = provider_registry.get(model_id)
 
-    async def fetch_deep_dive(domain):
+    # 6. Perform Parallel Deep-Dives, only for domains whose inputs changed
+    async def fetch_deep_dive(domain, documents, domain_fingerprint):
         domain_name = domain.get('name', 'General Tech')
-        prompt = deep_dive_system_prompt.replace("{domain_name}", domain_name)
-        messages = [
-            {"role": "system", "content": prompt + f"\nUser Profile:\n{profile_summary}"},
-            {"role": "user", "content": f"Research Context extracted from SQLite FTS5:\n{data_context}\n\nPlease output the deep dive."}
-        ]
+        stored = await workspace_store.get_deep_dive(workspace_id, domain.get("domain_id"), domain_fingerprint)
+        if stored is not None:
+            return stored
+
+        messages = _build_messages(
+            "deep_dive",
+            f"Deep dive ({domain_name})",
+            render_domain_deep_dive(profile_summary),
+            f"**Domain to Analyze:** {domain_name}\n\nResearch Context extracted from SQLite FTS5:\n",
+            [d.get('content', '') for d in documents],
+            "\n\nPlease output the deep dive.",
+            budget
+        )
         # We use a simple Pydantic wrapper to force the LLM to return strictly the markdown text
         res = await llm.generate_json(messages, DomainDeepDive)
-        return f"### Deep Dive: {domain_name}\n{res.deep_dive_markdown}\n"
+        markdown = f"### Deep Dive: {domain_name}\n{res.deep_dive_markdown}\n"
+        await workspace_store.save_deep_dive(workspace_id, domain.get("domain_id"), domain_fingerprint, markdown)
+        return markdown
 
-    deep_dive_results = await asyncio.gather(*[fetch_deep_dive(d) for d in domains])
+    async def indexed_deep_dive(index, domain, documents, domain_fingerprint):
+        return index, domain, await fetch_deep_dive(domain, documents, domain_fingerprint)
+
+    # Deep dives get their share of the time left, the rest is kept for the final report
+    with deadline_scope(stage_budget(settings.SYNTHESIS_DEEP_DIVE_SHARE)):
+        tasks = [
+            asyncio.create_task(indexed_deep_dive(i, d, dd, fp))
+            for i, (d, dd, fp) in enumerate(zip(domains, domain_docs, domain_fingerprints))
+        ]
+    deep_dive_results = [None] * len(tasks)
+    try:
+        # Report each deep dive the moment it lands, fastest first
+        for next_done in asyncio.as_completed(tasks):
+            index, domain, markdown = await next_done
+            deep_dive_results[index] = markdown
+            yield {"type": "deep_dive", "index": index, "domain_id": domain.get("domain_id"), "name": domain.get("name"), "markdown": markdown}
+    finally:
+        # A failed deep dive or a disconnected client stops the rest
+        for task in tasks:
+            task.cancel()
     combined_deep_dives = "\n\n".join(deep_dive_results) if deep_dive_results else data_context
     
-    # 5. Final Synthesis Generation
-    prompt_path = os.path.join(os.path.dirname(__file__), "../prompts/synthesis.md")
-    with open(prompt_path, "r") as f:
-        system_prompt = f.read()
-
-    messages = [
-        {"role": "system", "content": system_prompt + f"\nUser Profile:\n{profile_summary}"},
-        {"role": "user", "content": f"Comprehensive Per-Domain Research Reports:\n{combined_deep_dives}\n\nOutputs must adhere to the JSON schema."}
-    ]
+    # 7. Final Synthesis Generation
+    messages = _build_messages(
+        "synthesis",
+        "Synthesis",
+        render_synthesis(profile_summary),
+        "Comprehensive Per-Domain Research Reports:\n",
+        deep_dive_results if deep_dive_results else [d.get('content', '') for d in docs],
+        "\n\nOutputs must adhere to the JSON schema.",
+        budget,
+        separator="\n\n" if deep_dive_results else "\n"
+    )
     
-    response = await llm.generate_json(messages, SynthesisResponse)
+    if stream_final:
+        response = None
+        async for response in llm.stream_json(messages, SynthesisResponse):
+            yield {"type": "synthesis_partial", "synthesis": response.model_dump(mode="json", exclude_none=True)}
+    else:
+        response = await llm.generate_json(messages, SynthesisResponse)
     response.appendix = combined_deep_dives
-    return response
+    await workspace_store.save_synthesis(workspace_id, fingerprint, model_id, response.model_dump_json())
+    yield {"type": "synthesis", "cached": False, "synthesis": response}
@@ -1,51 +1,69 @@
-import os
-from fastapi import APIRouter, Depends
+import json
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, List, Optional, Set
 
 from backend.models.domain import DomainExpansionResponse
-from backend.llm.gemini import GeminiProvider
-from backend.storage.profile_manager import profile_manager
-from backend.storage.workspace_manager import workspace_manager
+from backend.llm.registry import provider_registry
+from backend.llm.prompts import render_domain_expansion
+from backend.storage.profile_manager import profile_store
+from backend.storage.workspace_manager import workspace_store
 
 from backend.core.auth_utils import get_current_user, get_optional_current_user
+from backend.core.config import settings
+from backend.core.deadline import cancel_on_disconnect, deadline_scope
+from backend.core.logger import stream_logger
+from backend.core.singleflight import SingleFlight
+from backend.orchestrator.agent import orchestrator
+from backend.orchestrator.jobs import jobs_store
+from backend.orchestrator.worker import job_worker
 
 router = APIRouter(prefix="/api/workspace", tags=["workspace"])
-
-from backend.llm.anthropic_provider import AnthropicProvider
-from backend.llm.openai_provider import OpenAIProvider
+logger = logging.getLogger(__name__)
+ingest_flight = SingleFlight()
+# Pipelined research outlives the ingest request that started it
+_research_tasks: Set[asyncio.Task] = set()
 
 class TaskIngestionRequest(BaseModel):
     query: str
     model_id: str = "claude-haiku-4-5-20251001"
 
 @router.post("/ingest")
-async def ingest_task(req: TaskIngestionRequest, current_user: Optional[dict] = Depends(get_optional_current_user)):
-    # 1. Use req.model_id (user selection) for Synthesis Model
-    # 2. Use Claude 4.5 Haiku for initial ingestion/orchestration
-    orchestration_model = "claude-haiku-4-5-20251001"
-    
-    # Instantiate LLM for domain expansion (part of orchestration)
-    llm = AnthropicProvider(model_name=orchestration_model)
+async def ingest_task(req: TaskIngestionRequest, request: Request, current_user: Optional[dict] = Depends(get_optional_current_user)):
+    username = current_user["username"] if current_user else None
+    with deadline_scope(settings.INGEST_DEADLINE_SECONDS):
+        if username is None:
+            # Anonymous callers cannot be told apart, so never hand one another's workspace
+            return await cancel_on_disconnect(request, _ingest(req, username))
+        # Retries and double submits of the same query share one domain expansion
+        return await cancel_on_disconnect(request, ingest_flight.do((req.query, req.model_id, username), lambda: _ingest(req, username)))
 
+async def _expansion_messages(req: TaskIngestionRequest, username: Optional[str]) -> List[dict]:
     # 1. Load active user profile context
-    username = current_user["username"] if current_user else None
-    profile = profile_manager.load_profile(username)
+    profile = await profile_store.load_profile(username)
     profile_summary = profile.get("body", "Generic User") if profile else "Generic User"
 
-    prompt_path = os.path.join(os.path.dirname(__file__), "../prompts/domain_expansion.md")
-    with open(prompt_path, "r") as f:
-        system_prompt = f.read()
-
-    messages = [
-        {"role": "system", "content": system_prompt + f"\nUser Profile:\n{profile_summary}"},
+    return [
+        {"role": "system", "content": render_domain_expansion(profile_summary)},
         {"role": "user", "content": f"Task Query: {req.query}"}
     ]
+
+async def _ingest(req: TaskIngestionRequest, username: Optional[str]):
+    # 1. Use req.model_id (user selection) for Synthesis Model
+    # 2. Use Claude 4.5 Haiku for initial ingestion/orchestration
+    orchestration_model = "claude-haiku-4-5-20251001"
+    
+    # Shared LLM for domain expansion (part of orchestration)
+    llm = provider_registry.get(orchestration_model)
+    messages = await _expansion_messages(req, username)
     
     response = await llm.generate_json(messages, DomainExpansionResponse)
     
     # Save workspace with specific orchestration and synthesis models
-    ws_id = workspace_manager.create_workspace(
+    ws_id = await workspace_store.create_workspace(
         user_id=username, 
         user_query=req.query, 
         domains=response.domains,
@@ -62,13 +80,79 @@ async def ingest_task(req: TaskIngestionRequest, current_user: Optional[dict] =
         "is_anonymous": username is None
     }
 
+@router.post("/ingest/stream")
+async def ingest_task_stream(req: TaskIngestionRequest, current_user: Optional[dict] = Depends(get_optional_current_user)):
+    """Pipelined ingest streamed as NDJSON.
+
+    The workspace is created up front and announced in a `workspace` line. Each
+    domain is persisted, researched and sent as a `domain` line as soon as the
+    orchestration model finishes generating it; a `done` (or `error`) line ends
+    the stream. Research runs as a job already started for the workspace, so no
+    separate /api/orchestrator/start call is needed and live logs are available
+    on /api/stream/{workspace_id} straight away.
+    """
+    username = current_user["username"] if current_user else None
+    return StreamingResponse(_ingest_stream(req, username), media_type="application/x-ndjson")
+
+async def _ingest_stream(req: TaskIngestionRequest, username: Optional[str]) -> AsyncGenerator[str, None]:
+    orchestration_model = "claude-haiku-4-5-20251001"
+    llm = provider_registry.get(orchestration_model)
+    messages = await _expansion_messages(req, username)
+
+    ws_id = await workspace_store.create_workspace(user_id=username, user_query=req.query, domains=[], synthesis_model=req.model_id)
+    await stream_logger.open_session(ws_id)
+    # Research is tracked as a job so another worker resumes it if this process dies
+    job = await jobs_store.create_claimed(ws_id, job_worker.worker_id, job_worker.lease_seconds)
+
+    parsed: asyncio.Queue = asyncio.Queue()
+
+    async def parsed_domains():
+        while (domain := await parsed.get()) is not None:
+            yield domain
+
+    research = asyncio.create_task(job_worker.run_claimed(job, lambda job: orchestrator.run_pipelined(ws_id, parsed_domains(), job["id"])))
+    _research_tasks.add(research)
+    research.add_done_callback(_forget_research)
+
+    yield json.dumps({
+        "type": "workspace",
+        "workspace_id": ws_id,
+        "job_id": job["id"],
+        "query": req.query,
+        "orchestrator_model": orchestration_model,
+        "synthesis_model": req.model_id,
+        "is_anonymous": username is None
+    }) + "\n"
+
+    domains = 0
+    try:
+        # Only the expansion is bound to the request; research runs under its own deadline
+        with deadline_scope(settings.INGEST_DEADLINE_SECONDS):
+            async for domain in llm.stream_iterable(messages, DomainExpansionResponse, "domains"):
+                parsed.put_nowait(await workspace_store.add_domain(ws_id, domain))
+                domains += 1
+                yield json.dumps({"type": "domain", "domain": domain.model_dump()}) + "\n"
+        yield json.dumps({"type": "done", "workspace_id": ws_id, "domains": domains}) + "\n"
+    except Exception as e:
+        logger.exception("Streaming ingest failed for workspace %s", ws_id)
+        yield json.dumps({"type": "error", "workspace_id": ws_id, "message": str(e)}) + "\n"
+    finally:
+        # Domains already parsed are still researched if the client goes away
+        parsed.put_nowait(None)
+
+def _forget_research(task: asyncio.Task):
+    _research_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        # Already recorded as a failed job and on the workspace's event stream
+        logger.error("Pipelined research failed: %s", task.exception())
+
 @router.get("/")
-def list_workspaces(current_user: dict = Depends(get_current_user)):
-    return {"status": "success", "workspaces": workspace_manager.list_workspaces(current_user["username"])}
+async def list_workspaces(current_user: dict = Depends(get_current_user)):
+    return {"status": "success", "workspaces": await workspace_store.list_workspaces(current_user["username"])}
 
 @router.get("/{workspace_id}")
-def get_workspace(workspace_id: str, current_user: Optional[dict] = Depends(get_optional_current_user)):
-    ws = workspace_manager.get_workspace(workspace_id)
+async def get_workspace(workspace_id: str, current_user: Optional[dict] = Depends(get_optional_current_user)):
+    ws = await workspace_store.get_workspace(workspace_id)
     if not ws:
         return {"status": "error", "message": "Not found"}
     
@@ -1,6 +1,9 @@
 import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 import jwt # PyJWT
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -8,6 +11,7 @@ from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 
 from backend.core.config import settings
+from backend.core.ttl_cache import TTLCache
 
 # Configuration
 SECRET_KEY = settings.JWT_SECRET
@@ -27,6 +31,59 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool instead of the event loop.
+
+    At most `workers` hashes run at once; callers beyond `max_pending` waiting
+    ones are turned away with a 503 so a login burst cannot queue unboundedly.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 64):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bcrypt")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many authentication requests, retry shortly")
+        submitted = time.monotonic()
+
+        def timed():
+            waited = time.monotonic() - submitted
+            self.queue_seconds_total += waited
+            self.queue_seconds_max = max(self.queue_seconds_max, waited)
+            return fn(*args)
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_queue_ms": round(1000 * self.queue_seconds_total / self.completed, 2) if self.completed else 0.0,
+            "max_queue_ms": round(1000 * self.queue_seconds_max, 2),
+        }
+
+token_cache = TTLCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
+password_hasher = PasswordHasher(workers=settings.AUTH_HASH_WORKERS, max_pending=settings.AUTH_HASH_MAX_PENDING)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -45,6 +102,26 @@ def create_refresh_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _decode_username(token: str) -> Optional[str]:
+    """Username of a valid access token; decoded tokens are reused until they expire."""
+    username = token_cache.get(token)
+    if username is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        username = payload.get("sub")
+        if username is not None:
+            token_cache.set(token, username, ttl_seconds=payload.get("exp", 0) - time.time())
+    return username
+
+async def _load_user(username: str) -> Optional[dict]:
+    # Hot path: a cached row skips both the store thread and SQLite
+    from backend.storage.user_manager import user_manager, user_store
+    user = user_manager.cache.get(username)
+    if user is None:
+        user = await user_store.get_user_by_username(username)
+        if user is not None:
+            user_manager.cache.set(username, user)
+    return user
+
 async def get_current_user_token(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,8 +129,7 @@ async def get_current_user_token(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+        username = _decode_username(token)
         if username is None:
             raise credentials_exception
         return username
@@ -61,8 +137,7 @@ async def get_current_user_token(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
 
 async def get_current_user(username: str = Depends(get_current_user_token)):
-    from backend.storage.user_manager import user_manager
-    user = user_manager.get_user_by_username(username)
+    user = await _load_user(username)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     if not user["is_verified"]:
@@ -73,11 +148,9 @@ async def get_optional_current_user(token: Optional[str] = Depends(optional_oaut
     if not token:
         return None
     try:
-        from backend.storage.user_manager import user_manager
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+        username = _decode_username(token)
         if username:
-            return user_manager.get_user_by_username(username)
+            return await _load_user(username)
     except Exception:
         pass
     return None
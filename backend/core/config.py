@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 class Settings(BaseSettings):
@@ -24,6 +24,92 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     PRESENTON_API_KEY: Optional[str] = None
 
+    # Research Orchestration Settings
+    # Global cap on concurrent search sub-tasks across all runs, and per domain within a run
+    RESEARCH_MAX_CONCURRENCY: int = 8
+    RESEARCH_MAX_PER_DOMAIN: int = 2
+    # SSE Stream Settings: events kept per session for Last-Event-ID replay
+    STREAM_MAX_EVENTS_PER_SESSION: int = 1000
+    # "drop_oldest" keeps the latest events, "drop_newest" keeps the start of a run
+    STREAM_OVERFLOW_POLICY: str = "drop_oldest"
+    STREAM_MAX_SESSIONS: int = 1000
+    STREAM_FINISHED_TTL_SECONDS: float = 600
+    STREAM_IDLE_TTL_SECONDS: float = 1800
+    # How often expired sessions are evicted in the background
+    STREAM_SWEEP_INTERVAL_SECONDS: float = 60
+    # "memory" keeps SSE events in-process; "sqlite" shares them across uvicorn workers and worker processes on one host
+    EVENT_BUS_BACKEND: str = "memory"
+    EVENT_BUS_POLL_INTERVAL_SECONDS: float = 0.5
+
+    # Orchestration Job Queue Settings
+    # Set JOB_WORKERS_IN_PROCESS=false when running `python -m backend.orchestrator.worker` separately
+    JOB_WORKERS_IN_PROCESS: bool = True
+    JOB_WORKER_CONCURRENCY: int = 2
+    JOB_LEASE_SECONDS: float = 60.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    # Research Search Tool Settings: "simulated" (offline placeholder pages) or "http"
+    SEARCH_TOOL: str = "simulated"
+    # HTML results page; {query} is replaced by the URL-encoded sub-query
+    SEARCH_URL_TEMPLATE: str = "https://html.duckduckgo.com/html/?q={query}"
+    SEARCH_MAX_RESULTS: int = 3
+    FETCH_MAX_CONNECTIONS: int = 20
+    FETCH_MAX_PER_HOST: int = 4
+    FETCH_MAX_BYTES: int = 2_000_000
+    FETCH_TIMEOUT_SECONDS: float = 15.0
+    # Password hashing pool: bcrypt threads, and hashes allowed to wait before logins get a 503
+    AUTH_HASH_WORKERS: int = 2
+    AUTH_HASH_MAX_PENDING: int = 64
+    # Authenticated user rows and decoded tokens kept in memory between requests
+    AUTH_USER_CACHE_SIZE: int = 1024
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60
+    # SQLite tuning applied to every brain/*.db connection
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_CACHE_SIZE_MB: int = 16
+    # Threads per store serving reads alongside its single writer thread
+    STORE_READ_WORKERS: int = 4
+    # Knowledge base write-behind: documents are committed in batches of up to this size, or after this delay
+    KB_WRITE_BATCH_SIZE: int = 64
+    KB_WRITE_FLUSH_SECONDS: float = 0.05
+    # Documents retrieved from the knowledge base per domain deep dive
+    RETRIEVAL_TOP_K: int = 8
+    # Upper bound on input tokens per deep-dive/synthesis prompt, below each model's own window
+    CONTEXT_MAX_PROMPT_TOKENS: int = 24_000
+
+    # Deadlines: end-to-end budgets shared by every LLM call a request makes, plus a cap per call
+    # (per streamed item when streaming). Research jobs get their own budget, detached from the request.
+    LLM_CALL_TIMEOUT_SECONDS: float = 45.0
+    INGEST_DEADLINE_SECONDS: float = 60.0
+    SYNTHESIS_DEADLINE_SECONDS: float = 240.0
+    # Share of the synthesis budget the deep dives may use; the rest is kept for the final report
+    SYNTHESIS_DEEP_DIVE_SHARE: float = 0.6
+    RESEARCH_DEADLINE_SECONDS: float = 900.0
+    RESEARCH_QUERY_TIMEOUT_SECONDS: float = 60.0
+
+    # Provider rate limiting, per provider/model: requests and prompt tokens per minute (0 = unlimited)
+    # and an adaptive concurrency limit that backs off on 429s and slow responses. Vendor budgets differ by
+    # tier, so set them per provider in LLM_RATE_LIMITS; the SDKs' own retries are off and 429s are retried here.
+    # Override per provider or model with JSON, e.g. LLM_RATE_LIMITS='{"anthropic/claude-3-haiku-20240307": {"requests_per_minute": 4000}}'
+    LLM_REQUESTS_PER_MINUTE: float = 0
+    LLM_TOKENS_PER_MINUTE: float = 0
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MIN_CONCURRENCY: int = 1
+    # Only calls close to LLM_CALL_TIMEOUT_SECONDS count as slow: long completions are legitimately slow
+    LLM_TARGET_LATENCY_SECONDS: float = 40.0
+    # Pause after a 429 that carries no Retry-After header, and how many times a rate-limited call is retried
+    LLM_RATE_LIMIT_BACKOFF_SECONDS: float = 2.0
+    LLM_RATE_LIMIT_RETRIES: int = 3
+    LLM_RATE_LIMITS: Dict[str, Dict[str, float]] = {}
+
+    # Mark the shared system prompt of Anthropic requests as a prompt-cache prefix
+    ANTHROPIC_PROMPT_CACHING: bool = True
+
+    # LLM Response Cache Settings (opt-in exact-match cache of generate_json calls)
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_TTL_SECONDS: int = 60 * 60 * 24 # 1 day
+    LLM_CACHE_SIZE_LIMIT_MB: int = 256
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+from fastapi import HTTPException, Request
+
+T = TypeVar("T")
+
+# Absolute time.monotonic() by which the current request must be done; None means unbounded.
+# Tasks copy the context they are created in, so the deadline follows work into child tasks.
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline, or the timeout of a single call within it, ran out."""
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def stage_budget(share: float) -> Optional[float]:
+    """The given share of the time remaining, for a stage that must leave room for later ones."""
+    left = remaining()
+    return None if left is None else max(0.0, left) * share
+
+@contextmanager
+def deadline_scope(seconds: Optional[float], detached: bool = False) -> Iterator[Optional[float]]:
+    """Bound everything awaited inside the block, and tasks created in it, to `seconds` from now.
+
+    A nested scope can only shorten the outer deadline, unless `detached` is set for
+    background work that outlives the request which started it.
+    """
+    deadline = None if seconds is None else time.monotonic() + seconds
+    outer = None if detached else _deadline.get()
+    if outer is not None and (deadline is None or outer < deadline):
+        deadline = outer
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+def _budget(timeout: Optional[float]) -> Optional[float]:
+    left = remaining()
+    if timeout is None:
+        return left
+    return timeout if left is None else min(left, timeout)
+
+async def with_deadline(awaitable: Awaitable[T], timeout: Optional[float] = None, label: str = "call") -> T:
+    """Await under the current deadline, and under `timeout` when that is shorter."""
+    budget = _budget(timeout)
+    if budget is None:
+        return await awaitable
+    if budget <= 0:
+        close = getattr(awaitable, "close", None)
+        if close is not None:
+            close() # Never started, avoid the "never awaited" warning
+        raise DeadlineExceeded(f"No time left for {label}")
+    try:
+        # asyncio.timeout cancels in place, so clients holding per-task state are not moved across tasks
+        async with asyncio.timeout(budget):
+            return await awaitable
+    except DeadlineExceeded:
+        raise
+    except TimeoutError as e:
+        raise DeadlineExceeded(f"{label} timed out after {budget:.1f}s") from e
+
+async def iterate_with_deadline(iterator: AsyncIterator[T], timeout: Optional[float] = None, label: str = "stream") -> AsyncIterator[T]:
+    """Re-yield `iterator`, allowing at most `timeout` (and the deadline) for each next item."""
+    try:
+        while True:
+            try:
+                item = await with_deadline(iterator.__anext__(), timeout, label)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.5) -> T:
+    """Await a non-streaming handler's work, cancelling it once the client has gone away.
+
+    Streaming responses need no help: Starlette already cancels their body on disconnect.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        task.cancel()
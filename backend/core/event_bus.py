@@ -0,0 +1,421 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import AsyncGenerator, Deque, Dict, Any, List, Optional, Tuple
+from sqlite_utils import Database
+
+from backend.storage.async_store import AsyncStore
+from backend.storage.sqlite import ConnectionFactory
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+logger = logging.getLogger(__name__)
+
+EVENTS_DB = os.path.join(os.path.dirname(__file__), "../../brain/events.db")
+
+# (event id, event, serialized event)
+EventRecord = Tuple[int, Dict[str, Any], str]
+
+class EventBus(ABC):
+    """Storage and fan-out of per-session SSE events behind StreamLogger."""
+
+    @abstractmethod
+    async def open_session(self, session_id: str):
+        """Start (or restart) a session; a finished session begins a new run with fresh history."""
+        pass
+
+    @abstractmethod
+    async def close_session(self, session_id: str):
+        """Drop a session and its events, ending every subscriber's stream."""
+        pass
+
+    @abstractmethod
+    async def has_session(self, session_id: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def publish(self, session_id: str, event: Dict[str, Any], terminal: bool = False) -> Optional[int]:
+        """Append an event; terminal marks the end of the session's current run."""
+        pass
+
+    @abstractmethod
+    async def history(self, session_id: str, last_event_id: int = 0) -> List[EventRecord]:
+        pass
+
+    @abstractmethod
+    def subscribe(self, session_id: str, last_event_id: int = 0) -> AsyncGenerator[EventRecord, None]:
+        """Yield every event after last_event_id, then live events until the run ends.
+        Subscribing never creates a session: the stream of an unknown id ends at once.
+        """
+        pass
+
+    @abstractmethod
+    async def sweep(self):
+        """Evict finished sessions past their TTL and sessions idle for longer than idle_ttl."""
+        pass
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        pass
+
+class StreamSession:
+    """Replayable event log of one session: a bounded ring buffer with monotonic ids."""
+
+    def __init__(self, max_events: int, overflow_policy: str = DROP_OLDEST, next_id: int = 1):
+        # Events keep their serialized form so each is encoded once for all subscribers
+        self.events: Deque[EventRecord] = deque()
+        self.max_events = max_events
+        self.overflow_policy = overflow_policy
+        self.next_id = next_id
+        self.finished = False
+        self.subscribers = 0
+        self.buffered_bytes = 0
+        self.dropped = 0
+        self.last_activity = time.monotonic()
+        self.wakeup = asyncio.Event()
+
+    def append(self, event: Dict[str, Any], force: bool = False) -> Optional[int]:
+        """Append an event, applying the overflow policy once the buffer is full.
+
+        force lets terminal markers past the DROP_NEWEST cap so they always get through.
+        """
+        if self.overflow_policy == DROP_NEWEST:
+            if len(self.events) >= self.max_events and not force:
+                self.dropped += 1
+                return None
+        elif len(self.events) >= self.max_events:
+            _, _, data = self.events.popleft()
+            self.buffered_bytes -= len(data)
+            self.dropped += 1
+
+        event_id = self.next_id
+        self.next_id += 1
+        data = json.dumps(event)
+        self.events.append((event_id, event, data))
+        self.buffered_bytes += len(data)
+        self.last_activity = time.monotonic()
+        # Wake every subscriber, then arm a fresh event for the next append
+        self.wakeup.set()
+        self.wakeup = asyncio.Event()
+        return event_id
+
+    def after(self, last_event_id: int) -> List[EventRecord]:
+        if not self.events or self.events[-1][0] <= last_event_id:
+            return []
+        return [e for e in self.events if e[0] > last_event_id]
+
+class MemoryEventBus(EventBus):
+    """In-process bus: only subscribers in the publishing process see the events."""
+
+    def __init__(self, max_events: int = 1000, max_sessions: int = 1000, finished_ttl: float = 600, idle_ttl: float = 1800, overflow_policy: str = DROP_OLDEST):
+        self.sessions: Dict[str, StreamSession] = {}
+        self.max_events = max_events
+        self.max_sessions = max_sessions
+        self.finished_ttl = finished_ttl
+        self.idle_ttl = idle_ttl
+        self.overflow_policy = overflow_policy
+        self.evicted = 0
+
+    async def open_session(self, session_id: str):
+        session = self.sessions.get(session_id)
+        if session is None:
+            self._make_room()
+            self.sessions[session_id] = StreamSession(self.max_events, self.overflow_policy)
+        elif session.finished:
+            # Ids stay monotonic across runs so stale Last-Event-IDs never collide
+            self.sessions[session_id] = StreamSession(self.max_events, self.overflow_policy, next_id=session.next_id)
+            session.wakeup.set()
+
+    async def close_session(self, session_id: str):
+        self._close(session_id)
+
+    async def has_session(self, session_id: str) -> bool:
+        return session_id in self.sessions
+
+    async def publish(self, session_id: str, event: Dict[str, Any], terminal: bool = False) -> Optional[int]:
+        session = self.sessions.get(session_id)
+        if session is None or session.finished:
+            return None
+        event_id = session.append(event, force=terminal)
+        if terminal:
+            session.finished = True
+        return event_id
+
+    async def history(self, session_id: str, last_event_id: int = 0) -> List[EventRecord]:
+        session = self.sessions.get(session_id)
+        return session.after(last_event_id) if session else []
+
+    async def subscribe(self, session_id: str, last_event_id: int = 0) -> AsyncGenerator[EventRecord, None]:
+        subscribed = self.sessions.get(session_id)
+        if subscribed is None:
+            return
+
+        cursor = last_event_id
+        subscribed.subscribers += 1
+        try:
+            while True:
+                session = self.sessions.get(session_id)
+                if session is None:
+                    break
+                if session is not subscribed:
+                    subscribed.subscribers -= 1
+                    subscribed = session
+                    subscribed.subscribers += 1
+                session.last_activity = time.monotonic()
+                wakeup = session.wakeup
+                for event in session.after(cursor):
+                    cursor = event[0]
+                    yield event
+                    if event[1].get("type") == "DONE":
+                        return
+                if session.finished:
+                    # Resumed past the DONE marker of a finished run
+                    return
+                await wakeup.wait()
+        finally:
+            subscribed.subscribers -= 1
+
+    async def sweep(self):
+        self._sweep()
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self.sessions),
+            "subscribers": sum(s.subscribers for s in self.sessions.values()),
+            "buffered_events": sum(len(s.events) for s in self.sessions.values()),
+            "buffered_bytes": sum(s.buffered_bytes for s in self.sessions.values()),
+            "dropped_events": sum(s.dropped for s in self.sessions.values()),
+            "evicted_sessions": self.evicted,
+        }
+
+    def _close(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session:
+            # Subscribers notice the session is gone and end their streams
+            session.wakeup.set()
+
+    def _sweep(self):
+        now = time.monotonic()
+        for session_id, session in list(self.sessions.items()):
+            idle = now - session.last_activity
+            if (session.finished and idle > self.finished_ttl) or idle > self.idle_ttl:
+                self._close(session_id)
+                self.evicted += 1
+
+    def _make_room(self):
+        if len(self.sessions) < self.max_sessions:
+            return
+        self._sweep()
+        # Only finished runs make room, least recently active first; a live run is never cut off
+        finished = sorted((s.last_activity, k) for k, s in self.sessions.items() if s.finished)
+        for _, session_id in finished[:max(0, len(self.sessions) - self.max_sessions + 1)]:
+            self._close(session_id)
+            self.evicted += 1
+        if len(self.sessions) >= self.max_sessions:
+            logger.warning("%d live stream sessions exceed STREAM_MAX_SESSIONS=%d", len(self.sessions), self.max_sessions)
+
+class SQLiteEventStore:
+    """Blocking storage behind SQLiteEventBus; the bus runs it on its own threads through AsyncStore."""
+
+    def __init__(self, path: str, max_events: int = 1000, max_sessions: int = 1000, finished_ttl: float = 600, idle_ttl: float = 1800):
+        self.connections = ConnectionFactory(path)
+        self.max_events = max_events
+        self.max_sessions = max_sessions
+        self.finished_ttl = finished_ttl
+        self.idle_ttl = idle_ttl
+        self.evicted = 0
+
+        if "stream_sessions" not in self.db.table_names():
+            self.db["stream_sessions"].create({
+                "session_id": str,
+                "run_start_id": int, # Events up to this id belong to earlier runs
+                "finished": bool,
+                "updated_at": float, # Epoch seconds
+            }, pk="session_id")
+        if "stream_events" not in self.db.table_names():
+            self.db.execute(
+                "create table stream_events (id integer primary key autoincrement, session_id text not null, "
+                "data text not null, terminal integer not null default 0, created_at real not null)"
+            )
+            self.db["stream_events"].create_index(["session_id", "id"])
+
+    @property
+    def db(self) -> Database:
+        return self.connections.db
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.db["stream_sessions"].get(session_id)
+        except Exception:
+            return None
+
+    def open_session(self, session_id: str):
+        session = self.get_session(session_id)
+        if session is None:
+            self._make_room()
+            self._write("insert or ignore into stream_sessions (session_id, run_start_id, finished, updated_at) values (?, 0, 0, ?)", [session_id, time.time()])
+        elif session["finished"]:
+            last_id = self.db.execute("select coalesce(max(id), 0) from stream_events where session_id = ?", [session_id]).fetchone()[0]
+            self._write("update stream_sessions set run_start_id = ?, finished = 0, updated_at = ? where session_id = ?", [last_id, time.time(), session_id])
+
+    def close_session(self, session_id: str):
+        with self.db.conn:
+            self.db.execute("delete from stream_events where session_id = ?", [session_id])
+            self.db.execute("delete from stream_sessions where session_id = ?", [session_id])
+
+    def publish(self, session_id: str, data: str, terminal: bool) -> Optional[int]:
+        now = time.time()
+        with self.db.conn:
+            # Only appends to an open run; checked in the same statement so a concurrent finish cannot slip in
+            cursor = self.db.execute(
+                "insert into stream_events (session_id, data, terminal, created_at) select ?, ?, ?, ? "
+                "where exists (select 1 from stream_sessions where session_id = ? and not finished)",
+                [session_id, data, int(terminal), now, session_id]
+            )
+            if not cursor.rowcount:
+                return None
+            event_id = cursor.lastrowid
+            # Keep only the newest max_events of the session
+            self.db.execute(
+                "delete from stream_events where session_id = ? and id <= "
+                "(select id from stream_events where session_id = ? order by id desc limit 1 offset ?)",
+                [session_id, session_id, self.max_events]
+            )
+            self.db.execute(
+                "update stream_sessions set finished = ?, updated_at = ? where session_id = ?",
+                [int(terminal), now, session_id]
+            )
+        return event_id
+
+    def poll(self, session_id: str, last_event_id: int = 0) -> Tuple[Optional[Dict[str, Any]], List[EventRecord]]:
+        """The session row and its current run's events after last_event_id, read together."""
+        session = self.get_session(session_id)
+        if session is None:
+            return None, []
+        rows = self.db.execute(
+            "select id, data from stream_events where session_id = ? and id > ? order by id",
+            [session_id, max(last_event_id, session["run_start_id"])]
+        ).fetchall()
+        return session, [(event_id, json.loads(data), data) for event_id, data in rows]
+
+    def sweep(self):
+        now = time.time()
+        expired = [r[0] for r in self.db.execute(
+            "select session_id from stream_sessions where (finished and updated_at < ?) or updated_at < ?",
+            [now - self.finished_ttl, now - self.idle_ttl]
+        ).fetchall()]
+        for session_id in expired:
+            self.close_session(session_id)
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        sessions, events, size = self.db.execute(
+            "select (select count(*) from stream_sessions), count(*), coalesce(sum(length(data)), 0) from stream_events"
+        ).fetchone()
+        return {"sessions": sessions, "buffered_events": events, "buffered_bytes": size, "evicted_sessions": self.evicted}
+
+    def _make_room(self):
+        if self.db.execute("select count(*) from stream_sessions").fetchone()[0] < self.max_sessions:
+            return
+        self.sweep()
+        # Only finished runs make room, least recently updated first; a live run is never cut off
+        count = self.db.execute("select count(*) from stream_sessions").fetchone()[0]
+        excess = count - self.max_sessions + 1
+        if excess > 0:
+            for (session_id,) in self.db.execute(
+                "select session_id from stream_sessions where finished order by updated_at limit ?", [excess]
+            ).fetchall():
+                self.close_session(session_id)
+                self.evicted += 1
+                count -= 1
+        if count >= self.max_sessions:
+            logger.warning("%d live stream sessions exceed STREAM_MAX_SESSIONS=%d", count, self.max_sessions)
+
+    def _write(self, sql: str, params: List[Any]):
+        with self.db.conn:
+            self.db.execute(sql, params)
+
+class SQLiteEventBus(EventBus):
+    """Bus shared by every process on the host through a WAL-mode SQLite event table.
+
+    Publishes in this process wake local subscribers immediately; events written
+    by other workers or instances sharing the file are picked up by polling. All
+    database work runs on the store's threads, so lock contention with other
+    processes never stalls the event loop.
+    """
+
+    def __init__(self, path: str = None, poll_interval: float = 0.5, max_events: int = 1000, max_sessions: int = 1000, finished_ttl: float = 600, idle_ttl: float = 1800):
+        self.store = AsyncStore(
+            SQLiteEventStore(path or EVENTS_DB, max_events, max_sessions, finished_ttl, idle_ttl),
+            "events",
+            reads={"get_session", "poll", "stats"}
+        )
+        self.poll_interval = poll_interval
+        # Local subscribers per session, and the event that wakes them on a local publish
+        self._subscribers: Dict[str, int] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+
+    async def open_session(self, session_id: str):
+        await self.store.open_session(session_id)
+        self._wake(session_id)
+
+    async def close_session(self, session_id: str):
+        await self.store.close_session(session_id)
+        self._wake(session_id)
+
+    async def has_session(self, session_id: str) -> bool:
+        return await self.store.get_session(session_id) is not None
+
+    async def publish(self, session_id: str, event: Dict[str, Any], terminal: bool = False) -> Optional[int]:
+        event_id = await self.store.publish(session_id, json.dumps(event), terminal)
+        if event_id is not None:
+            self._wake(session_id)
+        return event_id
+
+    async def history(self, session_id: str, last_event_id: int = 0) -> List[EventRecord]:
+        _, events = await self.store.poll(session_id, last_event_id)
+        return events
+
+    async def subscribe(self, session_id: str, last_event_id: int = 0) -> AsyncGenerator[EventRecord, None]:
+        cursor = last_event_id
+        self._subscribers[session_id] = self._subscribers.get(session_id, 0) + 1
+        try:
+            while True:
+                wakeup = self._wakeups.setdefault(session_id, asyncio.Event())
+                session, events = await self.store.poll(session_id, cursor)
+                if session is None:
+                    break
+                for event in events:
+                    cursor = event[0]
+                    yield event
+                    if event[1].get("type") == "DONE":
+                        return
+                if session["finished"]:
+                    return
+                try:
+                    # Long-poll: local publishes wake us at once, other processes within poll_interval
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._subscribers[session_id] -= 1
+            if not self._subscribers[session_id]:
+                del self._subscribers[session_id]
+                self._wakeups.pop(session_id, None)
+
+    async def sweep(self):
+        await self.store.sweep()
+
+    async def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "subscribers": sum(self._subscribers.values()), **await self.store.stats()}
+
+    def _wake(self, session_id: str):
+        wakeup = self._wakeups.pop(session_id, None)
+        if wakeup:
+            wakeup.set()
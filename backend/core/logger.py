@@ -1,47 +1,89 @@
 import asyncio
-import json
-from typing import AsyncGenerator, Dict, Any
+import logging
+from typing import AsyncGenerator, Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 
+from backend.core.config import settings
+from backend.core.event_bus import EventBus, MemoryEventBus, SQLiteEventBus
+
+logger = logging.getLogger(__name__)
+
 class StreamLogger:
-    def __init__(self):
-        # We will use an asyncio Queue to manage concurrent event streaming
-        self.queues: Dict[str, asyncio.Queue] = {}
+    def __init__(self, bus: EventBus):
+        # Where events live decides who can see them: this process only, or every worker on the host
+        self.bus = bus
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def open_session(self, session_id: str):
+        """Start (or restart) a session; a finished session begins a new run with fresh history."""
+        await self.bus.open_session(session_id)
 
-    def create_queue(self, session_id: str):
-        if session_id not in self.queues:
-            self.queues[session_id] = asyncio.Queue()
+    async def close_session(self, session_id: str):
+        await self.bus.close_session(session_id)
 
-    def remove_queue(self, session_id: str):
-        if session_id in self.queues:
-            del self.queues[session_id]
+    async def history(self, session_id: str, last_event_id: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+        return [(i, e) for i, e, _ in await self.bus.history(session_id, last_event_id)]
 
     async def log_event(self, session_id: str, event_type: str, payload: Any):
-        """Log an event and push it to the queue for SSE streaming."""
-        if session_id in self.queues:
-            event_data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "type": event_type,
-                "payload": payload
-            }
-            await self.queues[session_id].put(event_data)
-            
+        """Log an event and publish it to the session's log for SSE streaming."""
+        event_data = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "type": event_type,
+            "payload": payload
+        }
+        await self.bus.publish(session_id, event_data)
+
     async def finish_stream(self, session_id: str):
-        if session_id in self.queues:
-             await self.queues[session_id].put({"type": "DONE"})
-
-    async def stream_events(self, session_id: str) -> AsyncGenerator[str, None]:
-        if session_id not in self.queues:
-            self.create_queue(session_id)
-            
-        try:
-            while True:
-                event = await self.queues[session_id].get()
-                if event.get("type") == "DONE":
-                    yield f"data: {json.dumps(event)}\n\n"
-                    break
-                yield f"data: {json.dumps(event)}\n\n"
-        finally:
-            pass # Keep queue alive if multiple listeners? Typically one listener per session.
-
-stream_logger = StreamLogger()
+        await self.bus.publish(session_id, {"type": "DONE"}, terminal=True)
+
+    async def stream_events(self, session_id: str, last_event_id: int = 0) -> AsyncGenerator[str, None]:
+        """Yield SSE frames for every event after last_event_id, then follow live events until DONE."""
+        async for event_id, _, data in self.bus.subscribe(session_id, last_event_id):
+            yield f"id: {event_id}\ndata: {data}\n\n"
+
+    async def sweep(self):
+        await self.bus.sweep()
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self.bus.stats()
+
+    def start(self, sweep_interval: float):
+        """Evict expired sessions every sweep_interval seconds until stop()."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_periodically(sweep_interval))
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Stream session sweep failed")
+
+def create_event_bus() -> EventBus:
+    if settings.EVENT_BUS_BACKEND == "sqlite":
+        return SQLiteEventBus(
+            poll_interval=settings.EVENT_BUS_POLL_INTERVAL_SECONDS,
+            max_events=settings.STREAM_MAX_EVENTS_PER_SESSION,
+            max_sessions=settings.STREAM_MAX_SESSIONS,
+            finished_ttl=settings.STREAM_FINISHED_TTL_SECONDS,
+            idle_ttl=settings.STREAM_IDLE_TTL_SECONDS
+        )
+    return MemoryEventBus(
+        max_events=settings.STREAM_MAX_EVENTS_PER_SESSION,
+        max_sessions=settings.STREAM_MAX_SESSIONS,
+        finished_ttl=settings.STREAM_FINISHED_TTL_SECONDS,
+        idle_ttl=settings.STREAM_IDLE_TTL_SECONDS,
+        overflow_policy=settings.STREAM_OVERFLOW_POLICY
+    )
+
+stream_logger = StreamLogger(create_event_bus())
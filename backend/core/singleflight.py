@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+class _Call:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it runs
+    await the same task instead of starting their own. The task is shielded
+    from any single caller's cancellation and only cancelled once every caller
+    waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.create_task(fn()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+class _Stream:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.events: List[Any] = []
+        self.error: Optional[Exception] = None
+        self.done = False
+        self.subscribers = 0
+        self.updated = asyncio.Event()
+
+    def notify(self):
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+class StreamFlight:
+    """SingleFlight for async generators: concurrent streams that share a key read one producer.
+
+    The first subscriber for a key starts the producer; later ones replay the
+    events produced so far, then follow it live. The producer is cancelled once
+    every subscriber has gone away.
+    """
+
+    def __init__(self):
+        self._streams: Dict[Hashable, _Stream] = {}
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> AsyncGenerator[Any, None]:
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = self._streams[key] = _Stream()
+            flight.task = asyncio.create_task(self._produce(key, flight, fn))
+
+        flight.subscribers += 1
+        try:
+            index = 0
+            while True:
+                while index < len(flight.events):
+                    index += 1
+                    yield flight.events[index - 1]
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.updated.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def in_flight(self) -> int:
+        return len(self._streams)
+
+    async def _produce(self, key: Hashable, flight: _Stream, fn: Callable[[], AsyncIterator[Any]]):
+        try:
+            async for event in fn():
+                flight.events.append(event)
+                flight.notify()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            flight.notify()
+            self._forget(key, flight)
+
+    def _forget(self, key: Hashable, flight: _Stream):
+        if self._streams.get(key) is flight:
+            del self._streams[key]
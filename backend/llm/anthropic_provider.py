@@ -1,62 +1,105 @@
 import os
 import json
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, get_args
 from pydantic import BaseModel
 import anthropic
 import instructor
 
-from backend.llm.provider import LLMProvider
+from backend.core.config import settings
+from backend.llm.provider import LLMProvider, load_env
+from backend.llm.usage import llm_usage
 
 class AnthropicProvider(LLMProvider):
-    def __init__(self, model_name: str = "claude-3-5-sonnet-20241022", api_key: Optional[str] = None):
-        from dotenv import load_dotenv
-        
-        # Traverse up to find the root directory containing .env
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-        env_path = os.path.join(root_dir, '.env')
-        
-        if os.path.exists(env_path):
-            load_dotenv(dotenv_path=env_path)
-        
+    provider_name = "anthropic"
+
+    def __init__(self, model_name: str = "claude-3-5-sonnet-20241022", api_key: Optional[str] = None, client: Optional[anthropic.AsyncAnthropic] = None):
+        base_client = client or self.create_client(api_key)
+        # Patch with instructor to support Pydantic response_model easily
+        self.client = instructor.from_anthropic(base_client)
+        self.model_name = model_name
+
+    @classmethod
+    def create_client(cls, api_key: Optional[str] = None) -> anthropic.AsyncAnthropic:
+        env_path = load_env()
         key = api_key or os.getenv("ANTHROPIC_API_KEY") or os.getenv("CLAUDE_API_KEY")
         if not key:
             raise ValueError(f"Anthropic/Claude API Key not found in environment or {env_path}")
-            
-        # Initialize async anthropic client
-        base_client = anthropic.AsyncAnthropic(api_key=key)
-        # Patch with instructor to support Pydantic response_model easily
-        self.client = instructor.from_anthropic(base_client)
-        
-        # Model Mapping for layman/placeholders
-        self.model_mapping = {
-            "claude-haiku-4-5-20251001": "claude-3-haiku-20240307",
-            "claude-sonnet-4-6": "claude-3-haiku-20240307",
-            "claude-haiku-4-5": "claude-3-haiku-20240307",
-            "claude-sonnet-4-5": "claude-3-haiku-20240307",
-            "claude-haiku-4-6": "claude-3-haiku-20240307",
-        }
-        self.model_name = self.model_mapping.get(model_name, model_name)
+        # Initialize async anthropic client; 429s are retried by the rate limiter, not the SDK
+        return anthropic.AsyncAnthropic(api_key=key, max_retries=0)
 
-    async def generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
+    async def _generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
         # Instructor handles the Pydantic structured output mapping
-        import asyncio
+        # Timeouts and cancellation are applied by generate_json
         try:
-            resp = await asyncio.wait_for(
-                self.client.messages.create(
-                    model=self.model_name,
-                    max_tokens=4096,
-                    messages=messages,
-                    response_model=response_model
-                ),
-                timeout=45.0 # Reasonable timeout for a single LLM call
+            resp, completion = await self.client.messages.create_with_completion(
+                model=self.model_name,
+                max_tokens=4096,
+                response_model=response_model,
+                **self._request_messages(messages)
             )
+            self._record_usage(completion)
             return resp
-        except asyncio.TimeoutError:
-            raise ValueError(f"Anthropic LLM call timed out for model {self.model_name}")
         except Exception as e:
             raise ValueError(f"Anthropic LLM call failed: {str(e)}")
 
+    async def _stream_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> AsyncGenerator[BaseModel, None]:
+        # Instructor re-parses the growing tool-call JSON into partial models as tokens arrive
+        partial = None
+        try:
+            async for partial in self.client.messages.create_partial(
+                model=self.model_name,
+                max_tokens=4096,
+                response_model=response_model,
+                **self._request_messages(messages)
+            ):
+                yield partial
+        except Exception as e:
+            raise ValueError(f"Anthropic LLM stream failed: {str(e)}")
+        if partial is None:
+            raise ValueError(f"Anthropic LLM stream for model {self.model_name} returned no output")
+        yield response_model.model_validate(partial.model_dump())
+
+    async def _stream_iterable(self, messages: List[Dict[str, str]], response_model: type[BaseModel], field: str) -> AsyncGenerator[BaseModel, None]:
+        # Instructor emits each list element once its JSON object closes
+        item_model = get_args(response_model.model_fields[field].annotation)[0]
+        try:
+            async for item in self.client.messages.create_iterable(
+                model=self.model_name,
+                max_tokens=4096,
+                response_model=item_model,
+                **self._request_messages(messages)
+            ):
+                yield item
+        except Exception as e:
+            raise ValueError(f"Anthropic LLM stream failed: {str(e)}")
+
+    @staticmethod
+    def _request_messages(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Split out the system prompt and mark it as a prompt-cache breakpoint.
+
+        Callers put everything shared between requests in the system message, so
+        the tool schema and system prompt form a prefix later calls read from cache.
+        """
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        request: Dict[str, Any] = {"messages": [m for m in messages if m["role"] != "system"]}
+        if system:
+            block: Dict[str, Any] = {"type": "text", "text": system}
+            if settings.ANTHROPIC_PROMPT_CACHING:
+                block["cache_control"] = {"type": "ephemeral"}
+            request["system"] = [block]
+        return request
+
+    def _record_usage(self, completion: Any):
+        usage = getattr(completion, "usage", None)
+        if usage is not None:
+            llm_usage.record(
+                self.provider_name, self.model_name,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cache_read_tokens=getattr(usage, "cache_read_input_tokens", 0),
+                cache_write_tokens=getattr(usage, "cache_creation_input_tokens", 0)
+            )
+
     async def stream_response(self, messages: List[Dict[str, str]]) -> AsyncGenerator[str, None]:
         # Use underlying anthropic client for raw text streaming
         stream = await self.client.client.messages.create(
@@ -0,0 +1,71 @@
+import os
+import json
+import hashlib
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+import diskcache
+
+from backend.core.config import settings
+
+LLM_CACHE_DIR = os.path.join(os.path.dirname(__file__), "../../brain/llm_cache")
+
+class LLMResponseCache:
+    """Exact-match cache of structured LLM responses on local disk.
+
+    Keys cover the provider, model, full message list and the response_model's
+    JSON schema, so any change to the prompt or the expected shape misses.
+    Entries expire after the TTL and the least recently used are evicted once
+    the cache outgrows its size limit.
+    """
+
+    def __init__(self, directory: str = LLM_CACHE_DIR, ttl_seconds: int = 86400, size_limit_bytes: int = 256 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.cache = diskcache.Cache(directory, size_limit=size_limit_bytes, eviction_policy="least-recently-used")
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(provider: str, model_name: str, messages: List[Dict[str, Any]], response_model: type[BaseModel]) -> str:
+        schema = json.dumps(response_model.model_json_schema(), sort_keys=True)
+        payload = json.dumps({
+            "provider": provider,
+            "model": model_name,
+            "messages": messages,
+            "schema": hashlib.sha256(schema.encode("utf-8")).hexdigest(),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, response_model: type[BaseModel]) -> Optional[BaseModel]:
+        raw = self.cache.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        try:
+            value = response_model.model_validate_json(raw)
+        except ValueError:
+            # Stale entry from an incompatible model definition
+            self.cache.delete(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: BaseModel):
+        self.cache.set(key, value.model_dump_json(), expire=self.ttl_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.cache),
+            "size_bytes": self.cache.volume(),
+        }
+
+    def clear(self):
+        self.cache.clear()
+
+llm_cache = LLMResponseCache(
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    size_limit_bytes=settings.LLM_CACHE_SIZE_LIMIT_MB * 1024 * 1024
+) if settings.LLM_CACHE_ENABLED else None
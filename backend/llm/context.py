@@ -0,0 +1,85 @@
+import math
+import re
+from typing import List
+from pydantic import BaseModel
+
+# Context windows (input tokens) per model family, matched by substring of the model id
+MODEL_CONTEXT_WINDOWS = {
+    "claude": 200_000,
+    "gpt": 128_000,
+    "o1": 128_000,
+    "o3": 200_000,
+    "gemini": 1_000_000,
+}
+DEFAULT_CONTEXT_WINDOW = 32_000
+
+# Tokens reserved for the completion (providers request up to 4096) plus message framing
+RESERVED_OUTPUT_TOKENS = 4096 + 256
+
+# Below this many tokens a truncated chunk carries too little to be worth sending
+MIN_TRUNCATED_CHUNK_TOKENS = 64
+
+_WORD_RE = re.compile(r"\S+")
+
+class PackedContext(BaseModel):
+    text: str
+    tokens: int
+    included: int
+    truncated: int
+    dropped: int
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate: ~4 characters per token, never fewer than one per word."""
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), len(_WORD_RE.findall(text)))
+
+def prompt_budget(model_id: str, max_prompt_tokens: int) -> int:
+    """Input tokens a single prompt may use for this model, capped by max_prompt_tokens."""
+    model = model_id.lower()
+    window = next((w for family, w in MODEL_CONTEXT_WINDOWS.items() if family in model), DEFAULT_CONTEXT_WINDOW)
+    return min(window - RESERVED_OUTPUT_TOKENS, max_prompt_tokens)
+
+def pack_context(chunks: List[str], budget_tokens: int, separator: str = "\n") -> PackedContext:
+    """Joins chunks (highest ranked first) until the token budget is spent.
+
+    The first chunk that does not fit is truncated to the remaining budget when
+    enough of it survives, and every chunk after it is dropped, so the same
+    inputs always pack the same way.
+    """
+    parts: List[str] = []
+    used = 0
+    truncated = 0
+    separator_tokens = estimate_tokens(separator)
+
+    for i, chunk in enumerate(chunks):
+        cost = estimate_tokens(chunk) + (separator_tokens if parts else 0)
+        if used + cost <= budget_tokens:
+            parts.append(chunk)
+            used += cost
+            continue
+
+        remaining = budget_tokens - used - (separator_tokens if parts else 0)
+        if remaining >= MIN_TRUNCATED_CHUNK_TOKENS:
+            clipped = _truncate(chunk, remaining)
+            parts.append(clipped)
+            used += estimate_tokens(clipped) + (separator_tokens if len(parts) > 1 else 0)
+            truncated = 1
+        return PackedContext(
+            text=separator.join(parts),
+            tokens=used,
+            included=len(parts) - truncated,
+            truncated=truncated,
+            dropped=len(chunks) - i - truncated,
+        )
+
+    return PackedContext(text=separator.join(parts), tokens=used, included=len(parts), truncated=0, dropped=0)
+
+def _truncate(text: str, max_tokens: int) -> str:
+    # Cut on a character estimate, then back off to a word boundary until it fits
+    clipped = text[: max_tokens * 4]
+    while clipped and estimate_tokens(clipped) > max_tokens:
+        clipped = clipped[: int(len(clipped) * 0.9)]
+    if " " in clipped and len(clipped) < len(text):
+        clipped = clipped[: clipped.rfind(" ")]
+    return clipped
@@ -5,33 +5,30 @@ from pydantic import BaseModel
 from google import genai
 from google.genai import types
 
-from backend.llm.provider import LLMProvider
+from backend.llm.provider import LLMProvider, load_env
+from backend.llm.usage import llm_usage
 
 
 class GeminiProvider(LLMProvider):
-    def __init__(self, model_name: str = "gemini-3-pro-preview", api_key: Optional[str] = None):
-        from dotenv import load_dotenv
-        
-        # Traverse up to find the root directory containing .env
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-        env_path = os.path.join(root_dir, '.env')
-        
-        if os.path.exists(env_path):
-            load_dotenv(dotenv_path=env_path)
-        
+    provider_name = "gemini"
+
+    def __init__(self, model_name: str = "gemini-3-pro-preview", api_key: Optional[str] = None, client: Optional[genai.Client] = None):
+        self.client = client or self.create_client(api_key)
+        self.model_name = model_name
+
+    @classmethod
+    def create_client(cls, api_key: Optional[str] = None) -> genai.Client:
+        env_path = load_env()
         key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
         if not key:
             raise ValueError(f"Gemini API Key not found in environment or {env_path}")
-        self.client = genai.Client(api_key=key)
-        
-        # Model Mapping for layman/placeholders
-        self.model_mapping = {
-            "gemini-3-pro": "gemini-3-pro-preview",
-        }
-        self.model_name = self.model_mapping.get(model_name, model_name)
+        return genai.Client(api_key=key)
+
+    @staticmethod
+    async def close_client(client: genai.Client):
+        await client.aio.aclose()
 
-    async def generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
+    async def _generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
         contents = self._convert_messages(messages)
         
         # We use sync generate_content internally or async logic if google-genai supports it
@@ -44,6 +41,14 @@ class GeminiProvider(LLMProvider):
                 response_schema=response_model,
             ),
         )
+        usage = response.usage_metadata
+        if usage is not None:
+            llm_usage.record(
+                self.provider_name, self.model_name,
+                input_tokens=usage.prompt_token_count,
+                output_tokens=usage.candidates_token_count,
+                cache_read_tokens=usage.cached_content_token_count
+            )
         return response_model.model_validate_json(response.text)
 
     async def stream_response(self, messages: List[Dict[str, str]]) -> AsyncGenerator[str, None]:
@@ -3,32 +3,40 @@ from typing import Any, AsyncGenerator, Dict, List, Optional
 from pydantic import BaseModel
 from openai import AsyncOpenAI
 
-from backend.llm.provider import LLMProvider
+from backend.llm.provider import LLMProvider, load_env
+from backend.llm.usage import llm_usage
 
 class OpenAIProvider(LLMProvider):
-    def __init__(self, model_name: str = "gpt-5.2-2025-12-11", api_key: Optional[str] = None):
-        from dotenv import load_dotenv
-        
-        # Traverse up to find the root directory containing .env
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
-        env_path = os.path.join(root_dir, '.env')
-        
-        if os.path.exists(env_path):
-            load_dotenv(dotenv_path=env_path)
-        
+    provider_name = "openai"
+
+    def __init__(self, model_name: str = "gpt-5.2-2025-12-11", api_key: Optional[str] = None, client: Optional[AsyncOpenAI] = None):
+        self.client = client or self.create_client(api_key)
+        self.model_name = model_name
+
+    @classmethod
+    def create_client(cls, api_key: Optional[str] = None) -> AsyncOpenAI:
+        env_path = load_env()
         key = api_key or os.getenv("OPENAI_API_KEY")
         if not key:
             raise ValueError(f"OpenAI API Key not found in environment or {env_path}")
-        self.client = AsyncOpenAI(api_key=key)
-        self.model_name = model_name
+        # 429s are retried by the rate limiter, not the SDK
+        return AsyncOpenAI(api_key=key, max_retries=0)
 
-    async def generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
+    async def _generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
         completion = await self.client.beta.chat.completions.parse(
             model=self.model_name,
             messages=messages,
             response_format=response_model,
         )
+        if completion.usage is not None:
+            # OpenAI caches long shared prompt prefixes automatically and reports the hits
+            details = completion.usage.prompt_tokens_details
+            llm_usage.record(
+                self.provider_name, self.model_name,
+                input_tokens=completion.usage.prompt_tokens,
+                output_tokens=completion.usage.completion_tokens,
+                cache_read_tokens=details.cached_tokens if details else 0
+            )
         if completion.choices and completion.choices[0].message.parsed:
             return completion.choices[0].message.parsed
         raise ValueError("Failed to parse output format")
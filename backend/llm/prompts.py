@@ -0,0 +1,62 @@
+import os
+import re
+import hashlib
+from typing import Dict, FrozenSet
+
+PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "../prompts")
+
+# Every template the backend renders, with the placeholders it must contain
+PROMPT_SPECS: Dict[str, FrozenSet[str]] = {
+    "domain_expansion": frozenset(),
+    "domain_deep_dive": frozenset(),
+    "synthesis": frozenset(),
+}
+
+_PLACEHOLDER = re.compile(r"\{([a-z_]+)\}")
+
+class PromptTemplate:
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self.placeholders = frozenset(_PLACEHOLDER.findall(text))
+        # Content hash: changes exactly when the template does, so caches can key on it
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def render(self, **values: str) -> str:
+        if set(values) != self.placeholders:
+            raise ValueError(f"Prompt '{self.name}' expects {sorted(self.placeholders)}, got {sorted(values)}")
+        return _PLACEHOLDER.sub(lambda m: values[m.group(1)], self.text)
+
+class PromptRegistry:
+    """Every prompt template in backend/prompts, read and validated once per process."""
+
+    def __init__(self, directory: str = PROMPTS_DIR):
+        self.templates: Dict[str, PromptTemplate] = {}
+        for name, placeholders in PROMPT_SPECS.items():
+            path = os.path.join(directory, f"{name}.md")
+            with open(path, "r") as f:
+                template = PromptTemplate(name, f.read())
+            if template.placeholders != placeholders:
+                raise ValueError(f"Prompt '{name}' has placeholders {sorted(template.placeholders)}, expected {sorted(placeholders)}")
+            self.templates[name] = template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self.templates[name]
+
+    def versions(self) -> Dict[str, str]:
+        return {name: t.version for name, t in self.templates.items()}
+
+prompt_registry = PromptRegistry()
+
+def _with_profile(prompt: str, profile_summary: str) -> str:
+    return prompt + f"\nUser Profile:\n{profile_summary}"
+
+def render_domain_expansion(profile_summary: str) -> str:
+    return _with_profile(prompt_registry.get("domain_expansion").render(), profile_summary)
+
+def render_domain_deep_dive(profile_summary: str) -> str:
+    # Identical for every domain, so parallel deep dives share it as a cached prefix
+    return _with_profile(prompt_registry.get("domain_deep_dive").render(), profile_summary)
+
+def render_synthesis(profile_summary: str) -> str:
+    return _with_profile(prompt_registry.get("synthesis").render(), profile_summary)
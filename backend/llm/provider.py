@@ -1,20 +1,177 @@
+import os
+import asyncio
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import Any, AsyncGenerator, Dict, List, Optional
 from pydantic import BaseModel
 
+from backend.core.config import settings
+from backend.core.deadline import iterate_with_deadline, with_deadline
+from backend.llm.context import estimate_tokens
+from backend.llm.rate_limit import rate_limit_delay, rate_limiters
+
+@lru_cache(maxsize=None)
+def load_env() -> str:
+    """Load the root .env once per process and return its path."""
+    from dotenv import load_dotenv
+
+    # Traverse up to find the root directory containing .env
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+    env_path = os.path.join(root_dir, '.env')
+
+    if os.path.exists(env_path):
+        load_dotenv(dotenv_path=env_path)
+    return env_path
+
 class LLMProvider(ABC):
+    # Vendor name used for usage metrics and rate limits
+    provider_name = "llm"
+    # Optional LLMResponseCache consulted by generate_json; attached by the provider registry
+    cache = None
+
     @abstractmethod
-    def __init__(self, model_name: str, api_key: Optional[str] = None):
-        """Initialize the LLM provider."""
+    def __init__(self, model_name: str, api_key: Optional[str] = None, client: Optional[Any] = None):
+        """Initialize the LLM provider, reusing `client` when one is shared."""
         pass
 
+    @classmethod
     @abstractmethod
-    async def generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
+    def create_client(cls, api_key: Optional[str] = None) -> Any:
+        """Build the vendor's async client (and its connection pool)."""
+        pass
+
+    @staticmethod
+    async def close_client(client: Any):
+        """Release the connections held by a client from create_client."""
+        await client.close()
+
+    async def generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel], use_cache: bool = True) -> BaseModel:
         """Generate a structured JSON output mapped to a Pydantic model.
         messages should be a list of {"role": "user"|"assistant"|"system", "content": "..."}
+        Identical calls are answered from the response cache when one is attached,
+        unless use_cache is False. The call is bounded by LLM_CALL_TIMEOUT_SECONDS and
+        by the caller's deadline, whichever is sooner.
         """
+        if self.cache is None or not use_cache:
+            return await self._bounded_generate_json(messages, response_model)
+
+        key = self.cache.make_key(type(self).__name__, self.model_name, messages, response_model)
+        # diskcache does blocking SQLite and file IO, keep it off the event loop
+        cached = await asyncio.to_thread(self.cache.get, key, response_model)
+        if cached is not None:
+            return cached
+        response = await self._bounded_generate_json(messages, response_model)
+        await asyncio.to_thread(self.cache.set, key, response)
+        return response
+
+    @property
+    def rate_limiter(self):
+        # Shared with every other provider instance calling the same model
+        return rate_limiters.get(self.provider_name, self.model_name)
+
+    @staticmethod
+    def _prompt_tokens(messages: List[Dict[str, str]]) -> int:
+        return sum(estimate_tokens(m.get("content", "")) for m in messages)
+
+    @staticmethod
+    def _should_retry(error: Exception, attempt: int) -> bool:
+        # The SDKs do not retry, so a 429 is retried here once the limiter's pause has passed
+        return attempt < settings.LLM_RATE_LIMIT_RETRIES and rate_limit_delay(error) is not None
+
+    async def _bounded_generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
+        attempt = 0
+        while True:
+            try:
+                async with self.rate_limiter.slot(self._prompt_tokens(messages)):
+                    return await with_deadline(
+                        self._generate_json(messages, response_model),
+                        settings.LLM_CALL_TIMEOUT_SECONDS,
+                        label=f"{self.model_name} {response_model.__name__}"
+                    )
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+
+    async def _limited_stream(self, messages: List[Dict[str, str]], make_stream, label: str) -> AsyncGenerator[Any, None]:
+        """Yield from make_stream() inside a rate limiter slot, retrying 429s that arrive before the first item."""
+        attempt = 0
+        while True:
+            started = False
+            try:
+                # The call timeout applies to each item, so long healthy streams are not cut off.
+                # A stream's duration depends on its consumer, so it does not feed the latency signal.
+                async with self.rate_limiter.slot(self._prompt_tokens(messages), track_latency=False):
+                    async for item in iterate_with_deadline(make_stream(), settings.LLM_CALL_TIMEOUT_SECONDS, label=label):
+                        started = True
+                        yield item
+                return
+            except Exception as e:
+                if started or not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+
+    @abstractmethod
+    async def _generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
+        """Provider-specific structured generation behind generate_json."""
         pass
 
+    async def stream_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel], use_cache: bool = True) -> AsyncGenerator[BaseModel, None]:
+        """Stream progressively more complete structured outputs.
+        Intermediate items are partial models whose unfinished fields are None;
+        the last item is always a complete, validated response_model.
+        """
+        key = None
+        if self.cache is not None and use_cache:
+            key = self.cache.make_key(type(self).__name__, self.model_name, messages, response_model)
+            cached = await asyncio.to_thread(self.cache.get, key, response_model)
+            if cached is not None:
+                yield cached
+                return
+
+        response = None
+        partials = self._limited_stream(messages, lambda: self._stream_json(messages, response_model), f"{self.model_name} {response_model.__name__}")
+        async for response in partials:
+            yield response
+        if key is not None and response is not None:
+            await asyncio.to_thread(self.cache.set, key, response)
+
+    async def _stream_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> AsyncGenerator[BaseModel, None]:
+        """Provider-specific partial streaming; providers without it yield one complete result."""
+        yield await self._generate_json(messages, response_model)
+
+    async def stream_iterable(self, messages: List[Dict[str, str]], response_model: type[BaseModel], field: str, use_cache: bool = True) -> AsyncGenerator[BaseModel, None]:
+        """Stream the items of response_model's list `field` one at a time, each as soon as it parses.
+        Shares response cache entries with generate_json for the same messages and model.
+        """
+        key = None
+        if self.cache is not None and use_cache:
+            key = self.cache.make_key(type(self).__name__, self.model_name, messages, response_model)
+            cached = await asyncio.to_thread(self.cache.get, key, response_model)
+            if cached is not None:
+                for item in getattr(cached, field):
+                    yield item
+                return
+
+        items = []
+        stream = self._limited_stream(messages, lambda: self._stream_iterable(messages, response_model, field), f"{self.model_name} {response_model.__name__}")
+        async for item in stream:
+            items.append(item)
+            yield item
+        if key is not None:
+            try:
+                await asyncio.to_thread(self.cache.set, key, response_model.model_validate({field: items}))
+            except ValueError:
+                # The rest of the response is required and was never generated
+                pass
+
+    async def _stream_iterable(self, messages: List[Dict[str, str]], response_model: type[BaseModel], field: str) -> AsyncGenerator[BaseModel, None]:
+        """Provider-specific item streaming; providers without it yield the items of one complete result."""
+        response = await self._generate_json(messages, response_model)
+        for item in getattr(response, field):
+            yield item
+
     @abstractmethod
     async def stream_response(self, messages: List[Dict[str, str]]) -> AsyncGenerator[str, None]:
         """Stream a standard text response yielding chunks of string text."""
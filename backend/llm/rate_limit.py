@@ -0,0 +1,202 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from backend.core.config import settings
+from backend.core.deadline import with_deadline
+
+class TokenBucket:
+    """Continuously refilling budget of `per_minute` units; 0 means unlimited.
+
+    Reservations may overdraw the bucket, the caller then waits until the debt is
+    repaid, so a burst queues up instead of all retrying at once.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` and return how long to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float):
+        if self.rate > 0:
+            self.level = min(self.capacity, self.level + amount)
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """Seconds to pause after `error` if it (or an exception it wraps) is an HTTP 429, else None."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        # anthropic/openai expose status_code, google-genai exposes code
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        if status == 429:
+            response = getattr(error, "response", None)
+            retry_after = response.headers.get("retry-after") if response is not None else None
+            try:
+                return float(retry_after)
+            except (TypeError, ValueError):
+                return settings.LLM_RATE_LIMIT_BACKOFF_SECONDS
+        error = error.__cause__ or error.__context__
+    return None
+
+class AdaptiveLimiter:
+    """Requests-per-minute, tokens-per-minute and an AIMD concurrency limit for one provider model.
+
+    The concurrency limit grows by about one per round of successful calls and is
+    halved by a 429 (at most once per round: calls that started before the last cut
+    do not cut it again) and trimmed when latency exceeds the target. A 429 also
+    pauses every queued call for the provider's Retry-After.
+    """
+
+    def __init__(self, key: str, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int, min_concurrency: int = 1, target_latency: float = 30.0):
+        self.key = key
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.target_latency = target_latency
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.paused_until = 0.0
+        self._decreased_at = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._stats = {"requests": 0, "rate_limited": 0, "throttled_seconds": 0.0}
+
+    @asynccontextmanager
+    async def slot(self, tokens: int, track_latency: bool = True) -> AsyncIterator[None]:
+        """Hold one of the model's concurrent calls, after its request and token budget is available.
+        Time spent queued counts against the caller's deadline.
+        """
+        self.queued += 1
+        try:
+            await with_deadline(self._acquire(tokens), label=f"{self.key} rate limit queue")
+        finally:
+            self.queued -= 1
+
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            delay = rate_limit_delay(e) if isinstance(e, Exception) else None
+            if delay is not None:
+                self._on_rate_limited(started, delay)
+            raise
+        else:
+            if track_latency:
+                self._on_success(time.monotonic() - started, started)
+        finally:
+            self._release()
+
+    async def _acquire(self, tokens: int):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken but gone, pass the free slot on
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+        delay = max(self.requests.reserve(1), self.tokens.reserve(tokens), self.paused_until - time.monotonic())
+        if delay > 0:
+            self._stats["throttled_seconds"] += delay
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Given up while throttled (deadline, disconnect): return the budget and the slot
+                self.requests.refund(1)
+                self.tokens.refund(tokens)
+                self._release()
+                raise
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _on_success(self, latency: float, started: float):
+        self._stats["requests"] += 1
+        if latency > self.target_latency:
+            self._decrease(started, 0.9)
+        else:
+            # Additive increase: about +1 once a full window of calls has succeeded
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._wake()
+
+    def _on_rate_limited(self, started: float, delay: float):
+        self._stats["requests"] += 1
+        self._stats["rate_limited"] += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        self._decrease(started, 0.5)
+
+    def _decrease(self, started: float, factor: float):
+        if started < self._decreased_at:
+            return
+        self.limit = max(float(self.min_concurrency), self.limit * factor)
+        self._decreased_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "paused_seconds": round(max(0.0, self.paused_until - time.monotonic()), 3),
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()},
+        }
+
+class RateLimiterRegistry:
+    """One AdaptiveLimiter per provider and model, shared by every provider instance in the process.
+
+    Limits come from LLM_RATE_LIMITS["provider/model"], then LLM_RATE_LIMITS["provider"],
+    then the LLM_* defaults.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def get(self, provider: str, model_name: str) -> AdaptiveLimiter:
+        key = f"{provider}/{model_name}"
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limits = {**settings.LLM_RATE_LIMITS.get(provider, {}), **settings.LLM_RATE_LIMITS.get(key, {})}
+            limiter = self._limiters[key] = AdaptiveLimiter(
+                key,
+                requests_per_minute=limits.get("requests_per_minute", settings.LLM_REQUESTS_PER_MINUTE),
+                tokens_per_minute=limits.get("tokens_per_minute", settings.LLM_TOKENS_PER_MINUTE),
+                max_concurrency=int(limits.get("max_concurrency", settings.LLM_MAX_CONCURRENCY)),
+                min_concurrency=int(limits.get("min_concurrency", settings.LLM_MIN_CONCURRENCY)),
+                target_latency=limits.get("target_latency_seconds", settings.LLM_TARGET_LATENCY_SECONDS),
+            )
+        return limiter
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: limiter.stats() for key, limiter in self._limiters.items()}
+
+rate_limiters = RateLimiterRegistry()
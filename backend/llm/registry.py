@@ -0,0 +1,77 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from backend.llm.provider import LLMProvider
+from backend.llm.cache import llm_cache
+from backend.llm.anthropic_provider import AnthropicProvider
+from backend.llm.openai_provider import OpenAIProvider
+from backend.llm.gemini import GeminiProvider
+
+# Model Mapping for layman/placeholders, applied before a provider is built
+MODEL_MAPPING = {
+    "claude-haiku-4-5-20251001": "claude-3-haiku-20240307",
+    "claude-sonnet-4-6": "claude-3-haiku-20240307",
+    "claude-haiku-4-5": "claude-3-haiku-20240307",
+    "claude-sonnet-4-5": "claude-3-haiku-20240307",
+    "claude-haiku-4-6": "claude-3-haiku-20240307",
+    "gemini-3-pro": "gemini-3-pro-preview",
+}
+
+class ProviderRegistry:
+    """Process-wide pool of LLM providers.
+
+    Providers are cached per resolved model and every provider of the same
+    vendor shares one async client, so requests reuse pooled keep-alive
+    connections instead of opening new TLS sessions each time.
+    """
+
+    def __init__(self):
+        self._clients: Dict[type, Any] = {}
+        self._providers: Dict[Tuple[type, str], LLMProvider] = {}
+
+    @staticmethod
+    def provider_class(model_id: str) -> type[LLMProvider]:
+        model = model_id.lower()
+        if "claude" in model:
+            return AnthropicProvider
+        if "gpt" in model or "o1" in model or "o3" in model:
+            return OpenAIProvider
+        return GeminiProvider
+
+    @staticmethod
+    def resolve_model(model_id: str) -> str:
+        return MODEL_MAPPING.get(model_id, model_id)
+
+    def get(self, model_id: str) -> LLMProvider:
+        cls = self.provider_class(model_id)
+        key = (cls, self.resolve_model(model_id))
+        provider = self._providers.get(key)
+        if provider is None:
+            client = self._clients.get(cls)
+            if client is None:
+                client = self._clients[cls] = cls.create_client()
+            provider = self._providers[key] = cls(model_name=key[1], client=client)
+            provider.cache = llm_cache
+        return provider
+
+    def warm(self, model_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Build providers ahead of the first request; returns any per-model errors."""
+        errors: Dict[str, Optional[str]] = {}
+        for model_id in model_ids:
+            try:
+                self.get(model_id)
+                errors[model_id] = None
+            except ValueError as e:
+                # Missing keys only matter once that vendor is actually requested
+                errors[model_id] = str(e)
+        return errors
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        self._providers = {}
+        for cls, client in clients.items():
+            try:
+                await cls.close_client(client)
+            except Exception:
+                pass
+
+provider_registry = ProviderRegistry()
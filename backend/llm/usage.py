@@ -0,0 +1,59 @@
+import threading
+from typing import Dict
+
+class UsageTracker:
+    """Running token counts per provider and model, including prompt-cache reads and writes."""
+
+    FIELDS = ("requests", "input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model_name: str, input_tokens: int = 0, output_tokens: int = 0, cache_read_tokens: int = 0, cache_write_tokens: int = 0):
+        with self._lock:
+            totals = self._totals.setdefault(f"{provider}/{model_name}", dict.fromkeys(self.FIELDS, 0))
+            totals["requests"] += 1
+            totals["input_tokens"] += input_tokens or 0
+            totals["output_tokens"] += output_tokens or 0
+            totals["cache_read_tokens"] += cache_read_tokens or 0
+            totals["cache_write_tokens"] += cache_write_tokens or 0
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {key: dict(totals) for key, totals in self._totals.items()}
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+class PromptTracker:
+    """Running prompt sizes per prompt kind, and how their context chunks fared against the budget."""
+
+    FIELDS = ("prompts", "prompt_tokens", "context_tokens", "max_prompt_tokens", "chunks_included", "chunks_truncated", "chunks_dropped")
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, prompt_tokens: int, context_tokens: int, included: int = 0, truncated: int = 0, dropped: int = 0):
+        with self._lock:
+            totals = self._totals.setdefault(kind, dict.fromkeys(self.FIELDS, 0))
+            totals["prompts"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["context_tokens"] += context_tokens
+            totals["max_prompt_tokens"] = max(totals["max_prompt_tokens"], prompt_tokens)
+            totals["chunks_included"] += included
+            totals["chunks_truncated"] += truncated
+            totals["chunks_dropped"] += dropped
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: dict(totals) for kind, totals in self._totals.items()}
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+llm_usage = UsageTracker()
+prompt_usage = PromptTracker()
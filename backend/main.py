@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import asyncio
 import uuid
 import os
@@ -10,21 +10,40 @@ load_dotenv() # Load environmental variables from .env
 
 from backend.core.logger import stream_logger
 from backend.api import profile, workspace, orchestrator, synthesis, auth
-from backend.core.auth_utils import get_current_user
+from backend.core.auth_utils import get_current_user, password_hasher
+from backend.core.deadline import DeadlineExceeded
+from backend.llm.registry import provider_registry
+from backend.llm.cache import llm_cache
+from backend.llm.prompts import prompt_registry
+from backend.llm.rate_limit import rate_limiters
+from backend.llm.usage import llm_usage, prompt_usage
+from backend.orchestrator.agent import orchestrator as orchestrator_agent
+from backend.orchestrator.jobs import jobs_store
+from backend.orchestrator.worker import job_worker
+from backend.orchestrator.search_tool import search_tool
+from backend.storage.knowledgebase import document_writer
+from backend.storage.user_manager import user_manager
+from backend.core.config import settings
 
 app = FastAPI(title="layman.vuishere.com API")
 
 @app.on_event("startup")
 async def startup_event():
+    # Build the shared provider clients before the first request needs them
+    provider_registry.warm(["claude-haiku-4-5-20251001", "claude-sonnet-4-6"])
+    stream_logger.start(settings.STREAM_SWEEP_INTERVAL_SECONDS)
+
+    # Run orchestration jobs inside the API process unless dedicated workers are deployed
+    if settings.JOB_WORKERS_IN_PROCESS:
+        job_worker.start()
+
     # Auto-seed the database if no users exist
-    from backend.storage.user_manager import user_manager
-    from backend.core.auth_utils import get_password_hash
-    from backend.core.config import settings
+    from backend.storage.user_manager import user_store
     import secrets
     
     # Check if we have any users
     try:
-        users = list(user_manager.db["users"].rows)
+        users = await user_store.list_users()
     except Exception:
         users = []
         
@@ -49,8 +68,8 @@ async def startup_event():
         for username, email in users_to_create:
             # Use deterministic password if provided, else random
             password = seed_data.get(username, secrets.token_urlsafe(16))
-            hashed = get_password_hash(password)
-            user_manager.create_user(
+            hashed = await password_hasher.hash(password)
+            await user_store.create_user(
                 username=username,
                 email=email,
                 password_hash=hashed,
@@ -62,6 +81,14 @@ async def startup_event():
             else:
                 print(f"CREATED USER: {username} | DETERMINISTIC PASS: [REDACTED]")
     
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_worker.stop()
+    await stream_logger.stop()
+    await document_writer.flush()
+    await search_tool.aclose()
+    await provider_registry.aclose()
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -75,6 +102,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 app.include_router(auth.router)
 app.include_router(profile.router, dependencies=[Depends(get_current_user)])
 app.include_router(workspace.router)
@@ -85,11 +116,38 @@ app.include_router(synthesis.router, dependencies=[Depends(get_current_user)])
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "llm_cache": await asyncio.to_thread(llm_cache.stats) if llm_cache else None,
+        "jobs": await jobs_store.stats(),
+        "streams": await stream_logger.stats(),
+        "kb_writes": document_writer.stats(),
+        "auth_hashing": password_hasher.stats(),
+        "auth_user_cache": user_manager.cache.stats(),
+        "prompt_versions": prompt_registry.versions(),
+        "llm_usage": llm_usage.stats(),
+        "llm_prompts": prompt_usage.stats(),
+        "llm_rate_limits": rate_limiters.stats(),
+        "in_flight": {
+            "synthesis": synthesis.synthesis_flight.in_flight(),
+            "synthesis_stream": synthesis.synthesis_stream_flight.in_flight(),
+            "ingest": workspace.ingest_flight.in_flight(),
+            "planner": orchestrator_agent.planner_flight.in_flight(),
+        }
+    }
+
 @app.get("/api/stream/{session_id}")
-async def stream_logs(session_id: str, request: Request):
-    """Server-Sent Events endpoint to stream CoT and orchestrator logs."""
+async def stream_logs(session_id: str, request: Request, last_event_id: int = 0):
+    """Server-Sent Events endpoint to stream CoT and orchestrator logs.
+
+    Reconnecting browsers send Last-Event-ID and only receive the events they missed.
+    """
+    header = request.headers.get("last-event-id")
+    if header and header.isdigit():
+        last_event_id = int(header)
     return StreamingResponse(
-        stream_logger.stream_events(session_id),
+        stream_logger.stream_events(session_id, last_event_id),
         media_type="text/event-stream"
     )
 
@@ -1,61 +1,102 @@
 import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import Any, AsyncIterator, Dict, Optional
+from tenacity import retry, retry_if_exception, retry_if_exception_type, stop_after_attempt, wait_exponential
+from backend.core.config import settings
+from backend.core.deadline import deadline_scope, remaining, with_deadline
 from backend.core.logger import stream_logger
-from backend.storage.workspace_manager import workspace_manager
-from backend.storage.knowledgebase import knowledge_base
-from backend.llm.anthropic_provider import AnthropicProvider
-from backend.llm.gemini import GeminiProvider
+from backend.core.singleflight import SingleFlight
+from backend.orchestrator.scheduler import RESUMED, ResearchScheduler
+from backend.orchestrator.jobs import jobs_store
+from backend.orchestrator.search_tool import search_tool
+from backend.storage.workspace_manager import workspace_store
+from backend.storage.knowledgebase import document_writer
+from backend.llm.registry import provider_registry
+
+def _time_left(_: BaseException) -> bool:
+    # Retrying once the run's deadline has passed would only fail again.
+    # Only combined with retry_if_exception_type(Exception): a cancelled search must stay cancelled
+    left = remaining()
+    return left is None or left > 0
 
 class Orchestrator:
     def __init__(self):
-        self.llm = AnthropicProvider(model_name="claude-haiku-4-5-20251001")
+        # Shared by every run so concurrent workspaces respect one global cap
+        self.search_slots = asyncio.Semaphore(settings.RESEARCH_MAX_CONCURRENCY)
+        self.planner_flight = SingleFlight()
+
+    @property
+    def llm(self):
+        return provider_registry.get("claude-haiku-4-5-20251001")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), retry=retry_if_exception_type(Exception) & retry_if_exception(_time_left))
     async def _execute_search_tool(self, session_id: str, domain_id: str, query: str):
-        await stream_logger.log_event(session_id, "tool_call", {"tool": "FTS_Search_And_Scrape", "query": query})
-        
-        # Simulating external tool search and inserting into FTS5 layer
-        await asyncio.sleep(1.5) # Simulating latency
-        mock_content = f"Simulated high quality knowledge regarding {query}. This data discusses the precise tradeoffs in this technical domain."
-        
-        knowledge_base.insert_document(
-            workspace_id=session_id,
-            domain_id=domain_id,
-            title=f"Research: {query}",
-            content=mock_content,
-            source_url="https://simulated-source.com"
-        )
-        
-        await stream_logger.log_event(session_id, "tool_result", {"tool": "FTS_Search_And_Scrape", "status": "Success, inserted into FTS5"})
-
-    async def run_planner(self, workspace_id: str):
+        # Search, fetch and insert the resulting pages into the FTS5 layer
+        pages = await with_deadline(search_tool.run(query), settings.RESEARCH_QUERY_TIMEOUT_SECONDS, label=f"search '{query}'")
+        # Batched with the documents of concurrent workers; returns once committed
+        await document_writer.write([
+            {
+                "workspace_id": session_id,
+                "domain_id": domain_id,
+                "title": page.title,
+                "content": page.text,
+                "source_url": page.url
+            }
+            for page in pages
+        ])
+
+    async def run_planner(self, workspace_id: str, job_id: Optional[str] = None):
+        # A workspace is researched by at most one planner run at a time
+        return await self.planner_flight.do(workspace_id, lambda: self._run_planner(workspace_id, job_id))
+
+    async def run_pipelined(self, workspace_id: str, domains: AsyncIterator[Dict[str, Any]], job_id: Optional[str] = None):
+        """Research each domain as soon as it arrives, while the rest are still being generated."""
+        return await self.planner_flight.do(workspace_id, lambda: self._run_planner(workspace_id, job_id, domains))
+
+    async def _run_planner(self, workspace_id: str, job_id: Optional[str] = None, domains: Optional[AsyncIterator[Dict[str, Any]]] = None):
         # 1. Start streaming session
-        stream_logger.create_queue(workspace_id)
-        
-        try:
-            ws = workspace_manager.get_workspace(workspace_id)
-            if not ws:
-                await stream_logger.log_event(workspace_id, "error", {"message": "Workspace not found"})
-                return
-
-            await stream_logger.log_event(workspace_id, "status", {"message": "Planner Agent initialized. Loading Domains..."})
-            await asyncio.sleep(1)
+        await stream_logger.open_session(workspace_id)
+
+        # Research outlives the request that started it, so it runs on its own budget
+        with deadline_scope(settings.RESEARCH_DEADLINE_SECONDS, detached=True):
+            try:
+                ws = await workspace_store.get_workspace(workspace_id)
+                if not ws:
+                    await stream_logger.log_event(workspace_id, "error", {"message": "Workspace not found"})
+                    return
+
+                await stream_logger.log_event(workspace_id, "status", {"message": "Planner Agent initialized. Loading Domains..."})
             
-            domains = ws.get("domains", [])
-            for domain in domains:
-                await stream_logger.log_event(workspace_id, "thought", {"message": f"Analyzing domain {domain['name']}..."})
-                
-                queries = domain.get("search_queries", [])
-                for q in queries:
-                    await stream_logger.log_event(workspace_id, "thought", {"message": f"Dispatching worker for rationale: {q['rationale']}"})
+                # Sub-queries checkpointed by an earlier attempt of this job are not searched again
+                done = await jobs_store.completed_queries(job_id) if job_id else set()
+
+                async def execute(domain, q):
+                    if (domain["domain_id"], q["query"]) in done:
+                        return RESUMED
                     await self._execute_search_tool(workspace_id, domain["domain_id"], q["query"])
+                    if job_id:
+                        await jobs_store.checkpoint(job_id, domain["domain_id"], q["query"])
+
+                scheduler = ResearchScheduler(
+                    session_id=workspace_id,
+                    execute=execute,
+                    global_slots=self.search_slots,
+                    max_per_domain=settings.RESEARCH_MAX_PER_DOMAIN,
+                )
+                if domains is None:
+                    summaries = await scheduler.run(ws.get("domains", []))
+                else:
+                    async for domain in domains:
+                        scheduler.submit(domain)
+                    summaries = await scheduler.join()
             
-            await stream_logger.log_event(workspace_id, "status", {"message": "All subtask search agents completed. FTS5 Index hydrated."})
-            await stream_logger.log_event(workspace_id, "thought", {"message": "Transitioning to Synthesis Phase (Phase 5)."})
+                await stream_logger.log_event(workspace_id, "status", {"message": "All subtask search agents completed. FTS5 Index hydrated.", "domains": summaries})
+                await stream_logger.log_event(workspace_id, "thought", {"message": "Transitioning to Synthesis Phase (Phase 5)."})
+                return summaries
             
-        except Exception as e:
-            await stream_logger.log_event(workspace_id, "error", {"message": str(e)})
-        finally:
-            await stream_logger.finish_stream(workspace_id)
+            except Exception as e:
+                await stream_logger.log_event(workspace_id, "error", {"message": str(e)})
+                raise
+            finally:
+                await stream_logger.finish_stream(workspace_id)
 
 orchestrator = Orchestrator()
@@ -0,0 +1,290 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from sqlite_utils import Database
+
+from backend.core.config import settings
+from backend.storage.async_store import AsyncStore
+from backend.storage.sqlite import ConnectionFactory
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB = os.path.join(os.path.dirname(__file__), "../../brain/jobs.db")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class LeaseLost(Exception):
+    """A job's lease ran out before its worker could renew it, so another worker may own it now."""
+
+class JobQueue:
+    """Durable queue of orchestration jobs stored in SQLite.
+
+    A claimed job holds a lease that its worker keeps renewing; if the worker
+    dies the lease runs out and another worker reclaims the job. Renewing,
+    completing and failing a job only succeed for the worker holding the lease,
+    and a workspace has at most one queued or running job. Every finished
+    search sub-query is checkpointed, so a reclaimed job skips work that was
+    already done.
+    """
+
+    def __init__(self, max_attempts: int = 3):
+        self.connections = ConnectionFactory(JOBS_DB)
+        self.max_attempts = max_attempts
+
+        if "jobs" not in self.db.table_names():
+            self.db["jobs"].create({
+                "id": str,
+                "workspace_id": str,
+                "state": str,
+                "attempts": int,
+                "worker_id": str,
+                "lease_expires_at": float, # Epoch seconds
+                "created_at": str,
+                "updated_at": str,
+                "error": str,
+            }, pk="id")
+            self.db["jobs"].create_index(["state", "created_at"])
+            self.db["jobs"].create_index(["workspace_id"])
+        try:
+            # Enforces a single active job per workspace across every API instance sharing the file
+            self.db.execute(
+                "create unique index if not exists idx_jobs_active_workspace on jobs (workspace_id) "
+                f"where state in ('{QUEUED}', '{RUNNING}')"
+            )
+        except sqlite3.IntegrityError:
+            logger.warning("Workspaces with several active jobs found in %s; not enforcing one active job per workspace", JOBS_DB)
+
+        if "job_checkpoints" not in self.db.table_names():
+            self.db["job_checkpoints"].create({
+                "job_id": str,
+                "domain_id": str,
+                "query": str,
+                "completed_at": str,
+            }, pk=("job_id", "domain_id", "query"), foreign_keys=[
+                ("job_id", "jobs", "id")
+            ])
+
+    @property
+    def db(self) -> Database:
+        return self.connections.db
+
+    def enqueue(self, workspace_id: str) -> Dict[str, Any]:
+        """Queue a planner run, reusing the workspace's job if one is still active."""
+        active = self._active_job(workspace_id)
+        if active:
+            return active
+
+        now = datetime.now(timezone.utc).isoformat()
+        job_id = str(uuid.uuid4())
+        try:
+            self.db["jobs"].insert({
+                "id": job_id,
+                "workspace_id": workspace_id,
+                "state": QUEUED,
+                "attempts": 0,
+                "worker_id": None,
+                "lease_expires_at": None,
+                "created_at": now,
+                "updated_at": now,
+                "error": None
+            })
+        except sqlite3.IntegrityError:
+            # Another instance queued one between the check and the insert
+            return self._active_job(workspace_id)
+        return self.get(job_id)
+
+    def create_claimed(self, workspace_id: str, worker_id: str, lease_seconds: float) -> Dict[str, Any]:
+        """Record a job that the caller is already running, so another worker can take over if it dies."""
+        now = self._now()
+        job_id = str(uuid.uuid4())
+        self.db["jobs"].insert({
+            "id": job_id,
+            "workspace_id": workspace_id,
+            "state": RUNNING,
+            "attempts": 1,
+            "worker_id": worker_id,
+            "lease_expires_at": time.time() + lease_seconds,
+            "created_at": now,
+            "updated_at": now,
+            "error": None
+        })
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.db["jobs"].get(job_id)
+        except Exception:
+            return None
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job, or a running one whose lease expired."""
+        now = time.time()
+        with self.db.conn:
+            # Jobs that keep killing their workers are given up on
+            self.db.execute(
+                "update jobs set state = ?, error = ?, updated_at = ? "
+                "where state = ? and lease_expires_at < ? and attempts >= ?",
+                [FAILED, "Exceeded maximum attempts", self._now(), RUNNING, now, self.max_attempts]
+            )
+            rows = self.db.execute(
+                "update jobs set state = ?, worker_id = ?, lease_expires_at = ?, attempts = attempts + 1, updated_at = ? "
+                "where id = (select id from jobs where state = ? or (state = ? and lease_expires_at < ?) "
+                "order by created_at limit 1) returning *",
+                [RUNNING, worker_id, now + lease_seconds, self._now(), QUEUED, RUNNING, now]
+            )
+            columns = [c[0] for c in rows.description]
+            row = rows.fetchone()
+        return dict(zip(columns, row)) if row else None
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Renew the lease; False once the worker no longer holds it."""
+        with self.db.conn:
+            return self.db.execute(
+                "update jobs set lease_expires_at = ?, updated_at = ? where id = ? and worker_id = ? and state = ?",
+                [time.time() + lease_seconds, self._now(), job_id, worker_id, RUNNING]
+            ).rowcount > 0
+
+    def release(self, job_id: str, worker_id: str):
+        """Hand a running job back to the queue, e.g. when its worker shuts down."""
+        with self.db.conn:
+            self.db.execute(
+                "update jobs set state = ?, worker_id = null, lease_expires_at = null, updated_at = ? where id = ? and worker_id = ? and state = ?",
+                [QUEUED, self._now(), job_id, worker_id, RUNNING]
+            )
+
+    def complete(self, job_id: str, worker_id: str) -> bool:
+        """Mark the job done; False if the worker lost its lease and the job is no longer its own."""
+        with self.db.conn:
+            return self.db.execute(
+                "update jobs set state = ?, lease_expires_at = null, updated_at = ? where id = ? and worker_id = ? and state = ?",
+                [DONE, self._now(), job_id, worker_id, RUNNING]
+            ).rowcount > 0
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        with self.db.conn:
+            return self.db.execute(
+                "update jobs set state = ?, lease_expires_at = null, error = ?, updated_at = ? where id = ? and worker_id = ? and state = ?",
+                [FAILED, error, self._now(), job_id, worker_id, RUNNING]
+            ).rowcount > 0
+
+    def checkpoint(self, job_id: str, domain_id: str, query: str):
+        self.db["job_checkpoints"].upsert({
+            "job_id": job_id,
+            "domain_id": domain_id,
+            "query": query,
+            "completed_at": self._now()
+        }, pk=("job_id", "domain_id", "query"))
+
+    def completed_queries(self, job_id: str) -> Set[Tuple[str, str]]:
+        return {(r["domain_id"], r["query"]) for r in self.db["job_checkpoints"].rows_where("job_id = ?", [job_id])}
+
+    def stats(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for state, count in self.db.execute("select state, count(*) from jobs group by state").fetchall():
+            counts[state] = count
+        return counts
+
+    def _active_job(self, workspace_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return next(self.db["jobs"].rows_where(
+                "workspace_id = ? and state in (?, ?)", [workspace_id, QUEUED, RUNNING], order_by="created_at desc"
+            ))
+        except StopIteration:
+            return None
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+class JobWorker:
+    """Pool of coroutines that claim jobs from a JobQueue and run them.
+
+    `queue` is the AsyncStore over the JobQueue, so claims and lease renewals
+    never block the event loop.
+    """
+
+    def __init__(self, queue: AsyncStore, run_job: Callable[[Dict[str, Any]], Awaitable[Any]], concurrency: int, lease_seconds: float = 60.0, poll_interval: float = 1.0):
+        self.queue = queue
+        self.run_job = run_job
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        # Interrupted jobs are released back to the queue for another worker to resume
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _loop(self):
+        while True:
+            try:
+                job = await self.queue.claim(self.worker_id, self.lease_seconds)
+            except Exception:
+                # A locked or unavailable queue must not kill the worker
+                job = None
+            if job is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            try:
+                await self.run_claimed(job, self.run_job)
+            except Exception:
+                # Already recorded on the job; keep serving the queue
+                pass
+
+    async def run_claimed(self, job: Dict[str, Any], run_job: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Any:
+        """Run a job this worker holds the lease on, renewing the lease until it settles.
+        Raises LeaseLost, after cancelling the run, if the lease is taken over.
+        """
+        run = asyncio.create_task(run_job(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], run))
+        try:
+            result = await run
+            if not await self.queue.complete(job["id"], self.worker_id):
+                logger.warning("Job %s finished after its lease was lost; leaving it to its new owner", job["id"])
+            return result
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled():
+                # Cancelled by the heartbeat, not by our caller
+                raise LeaseLost(f"Lost the lease on job {job['id']}")
+            await self.queue.release(job["id"], self.worker_id)
+            raise
+        except Exception as e:
+            await self.queue.fail(job["id"], self.worker_id, str(e))
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, run: asyncio.Task):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds)
+            except Exception:
+                # A missed renewal is retried next beat; giving up would let the lease lapse and the job run twice
+                logger.exception("Lease renewal failed for job %s", job_id)
+                continue
+            if not renewed:
+                # Another worker reclaimed the job: stop running it here
+                logger.warning("Lost the lease on job %s, cancelling its run", job_id)
+                run.cancel()
+                return
+
+job_queue = JobQueue(max_attempts=settings.JOB_MAX_ATTEMPTS)
+jobs_store = AsyncStore(job_queue, "jobs", reads={"get", "completed_queries", "stats"})
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from backend.core.logger import stream_logger
+
+# (domain, query) -> awaitable running a single search sub-task; it returns RESUMED
+# when the query was already done by an earlier attempt of the job and was skipped
+SearchExecutor = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+RESUMED = "resumed"
+
+class ResearchScheduler:
+    """Fans search sub-queries out across all domains of a workspace at once.
+
+    Concurrency is bounded twice: a global semaphore shared by every run in the
+    process, and a per-domain cap so one wide domain cannot starve the others.
+    Sub-queries of a domain may finish in any order, but their SSE events are
+    emitted in query order so each domain reads sequentially in the live logs.
+    """
+
+    def __init__(self, session_id: str, execute: SearchExecutor, global_slots: asyncio.Semaphore, max_per_domain: int):
+        self.session_id = session_id
+        self.execute = execute
+        self.global_slots = global_slots
+        self.max_per_domain = max(1, max_per_domain)
+        self._domain_tasks: List[asyncio.Task] = []
+
+    def submit(self, domain: Dict[str, Any]) -> asyncio.Task:
+        """Schedule every search query of a domain; returns the domain's task."""
+        task = asyncio.create_task(self._run_domain(domain))
+        self._domain_tasks.append(task)
+        return task
+
+    async def join(self) -> List[Dict[str, Any]]:
+        """Wait for all submitted domains and return their completion summaries."""
+        try:
+            return list(await asyncio.gather(*self._domain_tasks))
+        finally:
+            # A failed or cancelled run stops the domains still searching
+            for task in self._domain_tasks:
+                task.cancel()
+
+    async def run(self, domains: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for domain in domains:
+            self.submit(domain)
+        return await self.join()
+
+    async def _run_query(self, domain_slots: asyncio.Semaphore, domain: Dict[str, Any], query: Dict[str, Any]):
+        async with domain_slots:
+            async with self.global_slots:
+                return await self.execute(domain, query)
+
+    async def _run_domain(self, domain: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        domain_slots = asyncio.Semaphore(self.max_per_domain)
+        queries = domain.get("search_queries", [])
+
+        await stream_logger.log_event(self.session_id, "thought", {"message": f"Analyzing domain {domain['name']}..."})
+
+        tasks = []
+        for q in queries:
+            await stream_logger.log_event(self.session_id, "thought", {"message": f"Dispatching worker for rationale: {q['rationale']}"})
+            await stream_logger.log_event(self.session_id, "tool_call", {"tool": "FTS_Search_And_Scrape", "query": q["query"]})
+            tasks.append(asyncio.create_task(self._run_query(domain_slots, domain, q)))
+
+        completed, resumed, failed = 0, 0, 0
+        try:
+            # Await in dispatch order so results are reported in query order
+            for q, task in zip(queries, tasks):
+                try:
+                    if await task == RESUMED:
+                        resumed += 1
+                        status = "Skipped, already inserted by an earlier attempt"
+                    else:
+                        completed += 1
+                        status = "Success, inserted into FTS5"
+                    await stream_logger.log_event(self.session_id, "tool_result", {"tool": "FTS_Search_And_Scrape", "query": q["query"], "status": status})
+                except Exception as e:
+                    failed += 1
+                    await stream_logger.log_event(self.session_id, "error", {"message": f"Search failed for '{q['query']}': {e}"})
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        summary = {
+            "domain_id": domain.get("domain_id"),
+            "name": domain.get("name"),
+            "completed": completed,
+            "resumed": resumed,
+            "failed": failed,
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }
+        message = f"Domain {domain['name']} finished: {completed}/{len(queries)} queries succeeded"
+        message += f", {resumed} resumed from an earlier attempt." if resumed else "."
+        await stream_logger.log_event(self.session_id, "status", {"message": message, "summary": summary})
+        return summary
@@ -0,0 +1,221 @@
+import os
+import asyncio
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from html.parser import HTMLParser
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, urljoin, urlparse, parse_qs
+from pydantic import BaseModel
+import diskcache
+import httpx
+
+from backend.core.config import settings
+
+PAGE_CACHE_DIR = os.path.join(os.path.dirname(__file__), "../../brain/page_cache")
+
+class FetchedPage(BaseModel):
+    url: str
+    title: str
+    text: str
+    truncated: bool = False
+    from_cache: bool = False # Revalidated with a 304 instead of downloaded again
+
+class SearchTool(ABC):
+    """Turns a research sub-query into pages for the knowledge base."""
+
+    @abstractmethod
+    async def run(self, query: str) -> List[FetchedPage]:
+        pass
+
+    async def aclose(self):
+        pass
+
+class SimulatedSearchTool(SearchTool):
+    """Offline stand-in that returns one placeholder page after a fixed latency."""
+
+    def __init__(self, latency: float = 1.5):
+        self.latency = latency
+
+    async def run(self, query: str) -> List[FetchedPage]:
+        await asyncio.sleep(self.latency) # Simulating latency
+        return [FetchedPage(
+            url="https://simulated-source.com",
+            title=f"Research: {query}",
+            text=f"Simulated high quality knowledge regarding {query}. This data discusses the precise tradeoffs in this technical domain."
+        )]
+
+class _TextExtractor(HTMLParser):
+    # Tags whose content is never readable page text
+    SKIP = {"script", "style", "noscript", "template", "svg", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.links: List[str] = []
+        self._parts: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip_depth += 1
+        if tag == "title":
+            self._in_title = True
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip_depth:
+            self._skip_depth -= 1
+        if tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth and data.strip():
+            self._parts.append(data.strip())
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self._parts)
+
+def extract_html(html: str) -> Tuple[str, str, List[str]]:
+    """(title, readable text, hrefs) of an HTML document."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.title.strip(), parser.text, parser.links
+
+class HttpSearchTool(SearchTool):
+    """Searches through an HTML results page and fetches the top hits over a pooled client.
+
+    Fetches are capped per host, bodies are read as a stream and cut off at
+    max_bytes, HTML parsing and page cache lookups run in worker threads, and pages
+    are revalidated with ETag/Last-Modified so unchanged pages cost a 304 instead
+    of a download.
+    """
+
+    def __init__(self, search_url: str, max_results: int = 3, max_connections: int = 20, max_per_host: int = 4, max_bytes: int = 2_000_000, timeout: float = 15.0, cache_dir: Optional[str] = PAGE_CACHE_DIR):
+        self.search_url = search_url
+        self.max_results = max_results
+        self.max_per_host = max(1, max_per_host)
+        self.max_bytes = max_bytes
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": "laymanlanguage-research/1.0"}
+        )
+        self.cache = diskcache.Cache(cache_dir) if cache_dir else None
+        # Per-host limits exist only while a host has fetches in flight, so the dict stays bounded
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._host_users: Dict[str, int] = {}
+
+    async def run(self, query: str) -> List[FetchedPage]:
+        urls = await self.search(query)
+        results = await asyncio.gather(*[self.fetch(url) for url in urls], return_exceptions=True)
+        pages = [r for r in results if isinstance(r, FetchedPage) and r.text]
+        if urls and not pages:
+            raise RuntimeError(f"No result could be fetched for '{query}'")
+        return pages
+
+    async def search(self, query: str) -> List[str]:
+        # Results pages are never cached, they change with every index update
+        results_page, links = await self._get(self.search_url.format(query=quote_plus(query)), revalidate=False)
+        search_host = urlparse(results_page.url).netloc
+        urls = []
+        for href in links:
+            url = self._result_url(urljoin(results_page.url, href))
+            if url and urlparse(url).netloc != search_host and url not in urls:
+                urls.append(url)
+            if len(urls) >= self.max_results:
+                break
+        return urls
+
+    async def fetch(self, url: str) -> FetchedPage:
+        page, _ = await self._get(url, revalidate=True)
+        return page
+
+    async def _get(self, url: str, revalidate: bool) -> Tuple[FetchedPage, List[str]]:
+        # diskcache does blocking SQLite and file IO
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache is not None and revalidate else None
+
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with self._host_slot(urlparse(url).netloc):
+            async with self.client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached:
+                    return FetchedPage(url=url, title=cached["title"], text=cached["text"], truncated=cached["truncated"], from_cache=True), []
+                response.raise_for_status()
+                body, truncated = await self._read_capped(response)
+                encoding = response.encoding or "utf-8"
+                final_url = str(response.url)
+                validators = {"etag": response.headers.get("etag"), "last_modified": response.headers.get("last-modified")}
+
+        html = body.decode(encoding, errors="replace")
+        # Parsing large pages is CPU-bound, keep it off the event loop
+        title, text, links = await asyncio.to_thread(extract_html, html)
+        page = FetchedPage(url=final_url, title=title or url, text=text, truncated=truncated)
+
+        if self.cache is not None and revalidate and (validators["etag"] or validators["last_modified"]):
+            await asyncio.to_thread(self.cache.set, url, {**validators, "title": page.title, "text": page.text, "truncated": truncated})
+        return page, links
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str) -> AsyncIterator[None]:
+        slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        self._host_users[host] = self._host_users.get(host, 0) + 1
+        try:
+            async with slots:
+                yield
+        finally:
+            self._host_users[host] -= 1
+            if not self._host_users[host]:
+                del self._host_users[host]
+                del self._host_slots[host]
+
+    async def _read_capped(self, response: httpx.Response) -> Tuple[bytes, bool]:
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) >= self.max_bytes:
+                return bytes(body[:self.max_bytes]), True
+        return bytes(body), False
+
+    @staticmethod
+    def _result_url(url: str) -> Optional[str]:
+        parsed = urlparse(url)
+        # Unwrap DuckDuckGo-style redirect links to the actual result
+        target = parse_qs(parsed.query).get("uddg")
+        if target:
+            parsed = urlparse(target[0])
+        if parsed.scheme not in ("http", "https"):
+            return None
+        return parsed._replace(fragment="").geturl()
+
+    async def aclose(self):
+        await self.client.aclose()
+        if self.cache is not None:
+            self.cache.close()
+
+def create_search_tool() -> SearchTool:
+    if settings.SEARCH_TOOL == "http":
+        return HttpSearchTool(
+            search_url=settings.SEARCH_URL_TEMPLATE,
+            max_results=settings.SEARCH_MAX_RESULTS,
+            max_connections=settings.FETCH_MAX_CONNECTIONS,
+            max_per_host=settings.FETCH_MAX_PER_HOST,
+            max_bytes=settings.FETCH_MAX_BYTES,
+            timeout=settings.FETCH_TIMEOUT_SECONDS
+        )
+    return SimulatedSearchTool()
+
+search_tool = create_search_tool()
@@ -0,0 +1,28 @@
+import asyncio
+from typing import Any, Dict
+
+from backend.core.config import settings
+from backend.orchestrator.agent import orchestrator
+from backend.orchestrator.jobs import JobWorker, jobs_store
+
+async def run_job(job: Dict[str, Any]):
+    await orchestrator.run_planner(job["workspace_id"], job_id=job["id"])
+
+job_worker = JobWorker(
+    jobs_store,
+    run_job,
+    concurrency=settings.JOB_WORKER_CONCURRENCY,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS
+)
+
+async def main():
+    """Standalone worker process: `PYTHONPATH=. python -m backend.orchestrator.worker`."""
+    job_worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await job_worker.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
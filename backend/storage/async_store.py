@@ -0,0 +1,39 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional
+
+from backend.core.config import settings
+
+class AsyncStore:
+    """Awaitable facade over a blocking storage manager.
+
+    Writes run on a single thread dedicated to this store, so they stay ordered
+    and never contend with each other for SQLite's write lock. Methods named in
+    `reads` run on a small pool next to it; with WAL and a connection per thread
+    (ConnectionFactory) they proceed while the writer commits. The event loop
+    never waits on disk. `await workspace_store.get_workspace(ws_id)` is the
+    async form of `workspace_manager.get_workspace(ws_id)`.
+    """
+
+    def __init__(self, manager: Any, name: str, reads: Iterable[str] = (), read_workers: Optional[int] = None):
+        self.manager = manager
+        self.reads = frozenset(reads)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"store-{name}")
+        workers = settings.STORE_READ_WORKERS if read_workers is None else read_workers
+        self.read_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"store-{name}-read") if self.reads and workers > 0 else None
+
+    def __getattr__(self, name: str):
+        method = getattr(self.manager, name)
+        if not callable(method):
+            return method
+        executor = self.read_executor if name in self.reads and self.read_executor is not None else self.executor
+
+        async def call(*args, **kwargs):
+            return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(method, *args, **kwargs))
+        return call
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        if self.read_executor is not None:
+            self.read_executor.shutdown(wait=True)
@@ -1,15 +1,20 @@
 import os
+import re
 import uuid
 import json
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Optional, Set, Tuple
 from sqlite_utils import Database
 
+from backend.core.config import settings
+from backend.storage.async_store import AsyncStore
+from backend.storage.sqlite import ConnectionFactory
+
 KNOWLEDGE_DB = os.path.join(os.path.dirname(__file__), "../../brain/knowledge.db")
 
 class KnowledgeBase:
     def __init__(self):
-        os.makedirs(os.path.dirname(KNOWLEDGE_DB), exist_ok=True)
-        self.db = Database(KNOWLEDGE_DB)
+        self.connections = ConnectionFactory(KNOWLEDGE_DB)
         
         if "documents" not in self.db.table_names():
             self.db["documents"].create({
@@ -24,15 +29,28 @@ class KnowledgeBase:
             # Enable Full Text Search (FTS5) for rapid capability search
             self.db["documents"].enable_fts(["title", "content"], fts_version="FTS5", create_triggers=True)
 
+        # Retrieval filters on these before FTS ranking, so keep them indexed
+        self.db["documents"].create_index(["workspace_id", "domain_id"], if_not_exists=True)
+
+    @property
+    def db(self) -> Database:
+        # This thread's own connection
+        return self.connections.db
+
     def insert_document(self, workspace_id: str, domain_id: str, title: str, content: str, source_url: str):
-        self.db["documents"].insert({
-            "id": str(uuid.uuid4()),
+        self.insert_documents([{
             "workspace_id": workspace_id,
             "domain_id": domain_id,
             "title": title,
             "content": content,
             "source_url": source_url
-        })
+        }])
+
+    def insert_documents(self, documents: List[Dict[str, Any]]):
+        """Insert many documents (and their FTS rows) in a single transaction."""
+        rows = [{"id": str(uuid.uuid4()), **d} for d in documents]
+        with self.db.conn:
+            self.db["documents"].insert_all(rows, batch_size=500)
         
     def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         # FTS5 search syntax
@@ -41,4 +59,119 @@ class KnowledgeBase:
         except Exception as e:
             return []
 
+    def retrieve(self, workspace_id: str, domain_id: Optional[str], queries: List[str], limit: int = 8) -> List[Dict[str, Any]]:
+        """Top-k documents of a workspace (and domain), ranked by bm25 against the queries.
+
+        Falls back to the most recent documents of the scope when no query term matches.
+        """
+        where = "workspace_id = :workspace_id"
+        where_args = {"workspace_id": workspace_id}
+        if domain_id is not None:
+            where += " and domain_id = :domain_id"
+            where_args["domain_id"] = domain_id
+
+        match = self._match_expression(queries)
+        if match:
+            try:
+                docs = list(self.db["documents"].search(match, where=where, where_args=where_args, limit=limit))
+                if docs:
+                    return docs
+            except Exception:
+                pass
+
+        return list(self.db["documents"].rows_where(where, where_args, order_by="rowid desc", limit=limit))
+
+    @staticmethod
+    def _match_expression(queries: List[str]) -> str:
+        # OR together every distinct term so bm25 rewards documents covering more of them
+        terms = []
+        for q in queries:
+            for term in re.findall(r"\w+", q.lower()):
+                if len(term) > 2 and term not in terms:
+                    terms.append(term)
+        return " OR ".join(f'"{t}"' for t in terms)
+
+class DocumentWriter:
+    """Write-behind buffer that commits documents from concurrent writers in batches.
+
+    write() returns once the caller's documents are committed. A batch is
+    flushed as soon as max_batch documents are pending, or max_delay seconds
+    after the first of them arrived.
+    """
+
+    def __init__(self, store: AsyncStore, max_batch: int = 64, max_delay: float = 0.05):
+        self.store = store
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._pending: List[Tuple[List[Dict[str, Any]], asyncio.Future]] = []
+        self._pending_docs = 0
+        self._timer: Optional[asyncio.Task] = None
+        # Commits run as their own tasks so a cancelled writer never strands a batch
+        self._flushes: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.documents = 0
+
+    async def write(self, documents: List[Dict[str, Any]]):
+        if not documents:
+            return
+        ack = asyncio.get_running_loop().create_future()
+        self._pending.append((documents, ack))
+        self._pending_docs += len(documents)
+        if self._pending_docs >= self.max_batch:
+            self._start_commit(self._take_batch())
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        await ack
+
+    async def flush(self):
+        """Commit everything pending now and wait for every commit still running,
+        settling each writer's acknowledgement.
+        """
+        self._start_commit(self._take_batch())
+        if self._flushes:
+            # Shielded: a cancelled flush must not cancel the commits other writers wait on
+            await asyncio.shield(asyncio.gather(*self._flushes))
+
+    def _start_commit(self, batch: List[Tuple[List[Dict[str, Any]], asyncio.Future]]):
+        if batch:
+            commit = asyncio.create_task(self._commit(batch))
+            self._flushes.add(commit)
+            commit.add_done_callback(self._flushes.discard)
+
+    def _take_batch(self) -> List[Tuple[List[Dict[str, Any]], asyncio.Future]]:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        batch, self._pending, self._pending_docs = self._pending, [], 0
+        return batch
+
+    async def _commit(self, batch: List[Tuple[List[Dict[str, Any]], asyncio.Future]]):
+        if not batch:
+            return
+        try:
+            await self.store.insert_documents([d for documents, _ in batch for d in documents])
+        except Exception as e:
+            for _, ack in batch:
+                if not ack.done():
+                    ack.set_exception(e)
+            return
+        self.batches += 1
+        self.documents += sum(len(documents) for documents, _ in batch)
+        for _, ack in batch:
+            if not ack.done():
+                ack.set_result(None)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_delay)
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_documents": self._pending_docs,
+            "batches": self.batches,
+            "documents": self.documents,
+        }
+
 knowledge_base = KnowledgeBase()
+knowledge_store = AsyncStore(knowledge_base, "knowledge", reads={"search", "retrieve"})
+document_writer = DocumentWriter(knowledge_store, max_batch=settings.KB_WRITE_BATCH_SIZE, max_delay=settings.KB_WRITE_FLUSH_SECONDS)
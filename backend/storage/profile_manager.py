@@ -1,12 +1,18 @@
 import os
+import copy
 import yaml
-from typing import Dict, Any, Optional
+import tempfile
+from typing import Dict, Any, Optional, Tuple
+
+from backend.storage.async_store import AsyncStore
 
 PROFILE_DIR = os.path.join(os.path.dirname(__file__), "../../../brain/profiles")
 
 class ProfileManager:
     def __init__(self):
         os.makedirs(PROFILE_DIR, exist_ok=True)
+        # path -> (mtime_ns, size, parsed profile); a changed file on disk invalidates its entry
+        self._cache: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
 
     def get_profile_path(self, user_id: str):
         return os.path.join(PROFILE_DIR, f"user_{user_id}.md")
@@ -17,8 +23,18 @@ class ProfileManager:
         content = f"---\n{frontmatter}---\n\n# User Profile Summary\n\n{summary}\n"
         
         path = self.get_profile_path(user_id)
-        with open(path, "w") as f:
-            f.write(content)
+        # Write to a temp file and rename over the profile so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=PROFILE_DIR, prefix=".profile-", suffix=".md")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        stat = os.stat(path)
+        self._cache[path] = (stat.st_mtime_ns, stat.st_size, self._parse(content))
 
     def load_profile(self, user_id: Optional[str]) -> Optional[Dict[str, Any]]:
         if not user_id:
@@ -27,12 +43,25 @@ class ProfileManager:
                 "body": "A technical architect focused on modernizing legacy systems and designing scalable, cloud-native infrastructures."
             }
         path = self.get_profile_path(user_id)
-        if not os.path.exists(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._cache.pop(path, None)
             return None
-            
+
+        cached = self._cache.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            # Callers may edit what they get back, so never hand out the cached dict itself
+            return copy.deepcopy(cached[2])
+
         with open(path, "r") as f:
             content = f.read()
-            
+        profile = self._parse(content)
+        self._cache[path] = (stat.st_mtime_ns, stat.st_size, profile)
+        return copy.deepcopy(profile)
+
+    @staticmethod
+    def _parse(content: str) -> Dict[str, Any]:
         if content.startswith("---"):
             parts = content.split("---", 2)
             if len(parts) >= 3:
@@ -59,7 +88,9 @@ class ProfileManager:
 
     def reset_profile(self, user_id: str):
         path = self.get_profile_path(user_id)
+        self._cache.pop(path, None)
         if os.path.exists(path):
             os.remove(path)
 
 profile_manager = ProfileManager()
+profile_store = AsyncStore(profile_manager, "profiles", reads={"load_profile"})
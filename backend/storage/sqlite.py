@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import threading
+from typing import List
+from sqlite_utils import Database
+
+from backend.core.config import settings
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a connection to a brain/*.db file with the shared tuning applied."""
+    conn = sqlite3.connect(path)
+    # WAL lets readers proceed while a writer commits; NORMAL only fsyncs at checkpoints under WAL
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    conn.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE_MB) * 1024 * 1024}")
+    # Negative cache_size is in KiB
+    conn.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_MB) * 1024}")
+    return conn
+
+class ConnectionFactory:
+    """Hands every thread its own tuned connection to one database file.
+
+    The store thread, the threadpool and the event loop thread never share a
+    connection, so no connection is used from a thread that did not open it.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+
+    @property
+    def db(self) -> Database:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            conn = connect(self.path)
+            with self._lock:
+                self._connections.append(conn)
+            db = self._local.db = Database(conn)
+        return db
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Owned by another thread; it is released when that thread exits
+                pass
+        self._local = threading.local()
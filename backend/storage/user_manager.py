@@ -1,15 +1,21 @@
 import os
 import uuid
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from sqlite_utils import Database
 
+from backend.core.config import settings
+from backend.core.ttl_cache import TTLCache
+from backend.storage.async_store import AsyncStore
+from backend.storage.sqlite import ConnectionFactory
+
 USER_DB = os.path.join(os.path.dirname(__file__), "../../brain/users.db")
 
 class UserManager:
     def __init__(self):
-        os.makedirs(os.path.dirname(USER_DB), exist_ok=True)
-        self.db = Database(USER_DB)
+        self.connections = ConnectionFactory(USER_DB)
+        # User rows by username for the auth dependency; dropped whenever a user changes
+        self.cache = TTLCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
         
         if "users" not in self.db.table_names():
             self.db["users"].create({
@@ -23,6 +29,11 @@ class UserManager:
             self.db["users"].create_index(["username"], unique=True)
             self.db["users"].create_index(["email"], unique=True)
 
+    @property
+    def db(self) -> Database:
+        # This thread's own connection
+        return self.connections.db
+
     def create_user(self, username: str, email: str, password_hash: str, is_verified: bool = False) -> str:
         user_id = str(uuid.uuid4())
         self.db["users"].insert({
@@ -47,7 +58,17 @@ class UserManager:
         except Exception:
             return None
 
+    def list_users(self) -> List[Dict[str, Any]]:
+        return list(self.db["users"].rows)
+
+    def update_user(self, user_id: str, updates: Dict[str, Any]):
+        user = self.get_user_by_id(user_id)
+        self.db["users"].update(user_id, updates)
+        if user:
+            self.cache.invalidate(user["username"])
+
     def verify_user(self, user_id: str):
-        self.db["users"].update(user_id, {"is_verified": True})
+        self.update_user(user_id, {"is_verified": True})
 
 user_manager = UserManager()
+user_store = AsyncStore(user_manager, "users", reads={"get_user_by_username", "get_user_by_id", "list_users"})
@@ -3,14 +3,16 @@ import uuid
 import json
 from typing import List, Optional, Dict, Any
 from sqlite_utils import Database
+
+from backend.storage.async_store import AsyncStore
+from backend.storage.sqlite import ConnectionFactory
 from backend.models.domain import DomainExpansion
 
 WORKSPACE_DB = os.path.join(os.path.dirname(__file__), "../../brain/workspace.db")
 
 class WorkspaceManager:
     def __init__(self):
-        os.makedirs(os.path.dirname(WORKSPACE_DB), exist_ok=True)
-        self.db = Database(WORKSPACE_DB)
+        self.connections = ConnectionFactory(WORKSPACE_DB)
         
         # Initialize tables if they don't exist
         if "workspaces" not in self.db.table_names():
@@ -44,6 +46,33 @@ class WorkspaceManager:
                 ("workspace_id", "workspaces", "id")
             ])
 
+        if "syntheses" not in self.db.table_names():
+            self.db["syntheses"].create({
+                "workspace_id": str,
+                "fingerprint": str, # Hash of every input the synthesis depends on
+                "model_id": str,
+                "created_at": str,
+                "response": str, # JSON serialized SynthesisResponse
+            }, pk="workspace_id", foreign_keys=[
+                ("workspace_id", "workspaces", "id")
+            ])
+
+        if "deep_dives" not in self.db.table_names():
+            self.db["deep_dives"].create({
+                "workspace_id": str,
+                "domain_id": str,
+                "fingerprint": str, # Hash of the domain's documents, profile, model and prompt
+                "created_at": str,
+                "markdown": str,
+            }, pk=("workspace_id", "domain_id"), foreign_keys=[
+                ("workspace_id", "workspaces", "id")
+            ])
+
+    @property
+    def db(self) -> Database:
+        # This thread's own connection
+        return self.connections.db
+
     def create_workspace(self, user_id: Optional[str], user_query: str, domains: List[DomainExpansion], synthesis_model: str = "claude-sonnet-4-6") -> str:
         from datetime import datetime, timezone
         ws_id = str(uuid.uuid4())
@@ -58,17 +87,23 @@ class WorkspaceManager:
         })
         
         for d in domains:
-            self.db["domains"].insert({
-                "id": str(uuid.uuid4()),
-                "workspace_id": ws_id,
-                "domain_id": d.id,
-                "name": d.name,
-                "description": d.description,
-                "search_queries": json.dumps([q.model_dump() for q in d.search_queries])
-            })
+            self.add_domain(ws_id, d)
             
         return ws_id
 
+    def add_domain(self, workspace_id: str, domain: DomainExpansion) -> Dict[str, Any]:
+        """Persist one domain of a workspace; returns it in the shape get_workspace uses."""
+        row = {
+            "id": str(uuid.uuid4()),
+            "workspace_id": workspace_id,
+            "domain_id": domain.id,
+            "name": domain.name,
+            "description": domain.description,
+            "search_queries": json.dumps([q.model_dump() for q in domain.search_queries])
+        }
+        self.db["domains"].insert(row)
+        return {**row, "search_queries": json.loads(row["search_queries"])}
+
     def update_workspace(self, workspace_id: str, updates: Dict[str, Any]):
         self.db["workspaces"].update(workspace_id, updates)
 
@@ -83,9 +118,46 @@ class WorkspaceManager:
         except Exception:
             return None
 
+    def get_deep_dive(self, workspace_id: str, domain_id: str, fingerprint: str) -> Optional[str]:
+        """Returns the stored deep-dive markdown if it was built from the same inputs."""
+        try:
+            row = self.db["deep_dives"].get((workspace_id, domain_id))
+        except Exception:
+            return None
+        return row["markdown"] if row["fingerprint"] == fingerprint else None
+
+    def save_deep_dive(self, workspace_id: str, domain_id: str, fingerprint: str, markdown: str):
+        from datetime import datetime, timezone
+        self.db["deep_dives"].upsert({
+            "workspace_id": workspace_id,
+            "domain_id": domain_id,
+            "fingerprint": fingerprint,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "markdown": markdown
+        }, pk=("workspace_id", "domain_id"))
+
+    def get_synthesis(self, workspace_id: str, fingerprint: str) -> Optional[str]:
+        """Returns the cached synthesis JSON if it was built from the same inputs."""
+        try:
+            row = self.db["syntheses"].get(workspace_id)
+        except Exception:
+            return None
+        return row["response"] if row["fingerprint"] == fingerprint else None
+
+    def save_synthesis(self, workspace_id: str, fingerprint: str, model_id: str, response_json: str):
+        from datetime import datetime, timezone
+        self.db["syntheses"].upsert({
+            "workspace_id": workspace_id,
+            "fingerprint": fingerprint,
+            "model_id": model_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": response_json
+        }, pk="workspace_id")
+
     def list_workspaces(self, user_id: Optional[str]) -> List[Dict[str, Any]]:
         if not user_id:
             return []
         return list(self.db["workspaces"].rows_where("user_id = ?", [user_id], order_by="created_at desc"))
 
 workspace_manager = WorkspaceManager()
+workspace_store = AsyncStore(workspace_manager, "workspace", reads={"get_workspace", "get_deep_dive", "get_synthesis", "list_workspaces"})
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import anthropic
+from pydantic import BaseModel
+from backend.llm.anthropic_provider import AnthropicProvider
+from backend.llm.usage import llm_usage
+
+class Answer(BaseModel):
+    text: str
+
+class MessagesHandler(BaseHTTPRequestHandler):
+    bodies = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        MessagesHandler.bodies.append(body)
+        data = json.dumps({
+            "id": "msg_1",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [{"type": "tool_use", "id": "toolu_1", "name": "Answer", "input": {"text": "ok"}}],
+            "stop_reason": "tool_use",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 12, "output_tokens": 5, "cache_read_input_tokens": 2048, "cache_creation_input_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def test_system_prompt_is_cacheable_and_usage_is_recorded():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MessagesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm_usage.reset()
+    try:
+        client = anthropic.AsyncAnthropic(api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}", max_retries=0)
+        provider = AnthropicProvider(model_name="claude-test", client=client)
+        messages = [
+            {"role": "system", "content": "Shared deep-dive prompt"},
+            {"role": "user", "content": "**Domain to Analyze:** Inference Serving"},
+        ]
+        assert asyncio.run(provider.generate_json(messages, Answer, use_cache=False)).text == "ok"
+    finally:
+        server.shutdown()
+
+    body = MessagesHandler.bodies[-1]
+    assert body["system"] == [{"type": "text", "text": "Shared deep-dive prompt", "cache_control": {"type": "ephemeral"}}]
+    assert [m["role"] for m in body["messages"]] == ["user"]
+    assert llm_usage.stats()["anthropic/claude-test"] == {
+        "requests": 1, "input_tokens": 12, "output_tokens": 5, "cache_read_tokens": 2048, "cache_write_tokens": 0
+    }
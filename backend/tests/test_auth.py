@@ -0,0 +1,84 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from backend.core.auth_utils import PasswordHasher
+
+def test_hashing_runs_off_the_event_loop():
+    hasher = PasswordHasher(workers=2, max_pending=8)
+
+    async def run():
+        ticks = 0
+        stop = time.monotonic() + 10
+
+        async def ticker():
+            nonlocal ticks
+            while time.monotonic() < stop:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        tick_task = asyncio.create_task(ticker())
+        hashed = await asyncio.gather(*[hasher.hash(f"pw{i}") for i in range(4)])
+        ok = await hasher.verify("pw0", hashed[0])
+        bad = await hasher.verify("wrong", hashed[0])
+        tick_task.cancel()
+        return ok, bad, ticks
+
+    ok, bad, ticks = asyncio.run(run())
+    assert ok and not bad
+    # The loop kept serving other coroutines while bcrypt ran
+    assert ticks > 5
+    stats = hasher.stats()
+    assert stats["completed"] == 6 and stats["pending"] == 0
+    assert stats["max_queue_ms"] > 0
+
+def test_hashing_rejects_past_the_pending_limit():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+
+    async def run():
+        return await asyncio.gather(*[hasher.hash("pw") for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1 and rejected[0].status_code == 503
+    assert hasher.stats()["rejected"] == 1
+
+def test_current_user_is_cached_until_the_user_changes(monkeypatch):
+    import os
+    import backend.storage.user_manager as um
+    from backend.core import auth_utils
+    from backend.storage.async_store import AsyncStore
+
+    db_path = "/tmp/test_users_cache.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    um.USER_DB = db_path
+    manager = um.UserManager()
+    calls = []
+
+    class CountingStore(AsyncStore):
+        def __getattr__(self, name):
+            calls.append(name)
+            return super().__getattr__(name)
+
+    monkeypatch.setattr(um, "user_manager", manager)
+    monkeypatch.setattr(um, "user_store", CountingStore(manager, "test-users"))
+    user_id = manager.create_user("alice", "alice@example.com", "hash")
+    token = auth_utils.create_access_token({"sub": "alice"})
+
+    async def current_user():
+        return await auth_utils.get_current_user(auth_utils._decode_username(token))
+
+    async def run():
+        with pytest.raises(HTTPException) as unverified:
+            await current_user()
+        manager.verify_user(user_id)
+        first = await current_user()
+        second = await current_user()
+        return unverified.value.status_code, first, second
+
+    status_code, first, second = asyncio.run(run())
+    assert status_code == 403
+    # Verification dropped the stale unverified row; the next lookup hit the cache
+    assert first["is_verified"] and second is first
+    assert calls == ["get_user_by_username", "get_user_by_username"]
@@ -0,0 +1,29 @@
+from backend.llm.context import estimate_tokens, pack_context, prompt_budget
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 100) == 100
+    # Many short words count at least one token each
+    assert estimate_tokens("a " * 50) == 50
+
+def test_prompt_budget_uses_model_window_and_cap():
+    assert prompt_budget("claude-sonnet-4-6", 24_000) == 24_000
+    assert prompt_budget("unknown-model", 1_000_000) < 32_000
+
+def test_pack_context_prefers_ranked_chunks_and_is_deterministic():
+    chunks = ["alpha " * 100, "beta " * 100, "gamma " * 100, "delta " * 100]
+    packed = pack_context(chunks, budget_tokens=400)
+
+    assert packed.tokens <= 400
+    assert packed.text.startswith("alpha")
+    assert "beta" in packed.text
+    assert packed.included == 2
+    assert packed.truncated == 1
+    assert packed.dropped == 1
+    assert "delta" not in packed.text
+    assert pack_context(chunks, budget_tokens=400) == packed
+
+def test_pack_context_fits_everything_within_budget():
+    packed = pack_context(["one", "two"], budget_tokens=100)
+    assert packed.text == "one\ntwo"
+    assert (packed.included, packed.truncated, packed.dropped) == (2, 0, 0)
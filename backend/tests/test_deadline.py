@@ -0,0 +1,112 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from backend.core.deadline import DeadlineExceeded, cancel_on_disconnect, deadline_scope, remaining, stage_budget
+from backend.llm.provider import LLMProvider
+
+class Answer(BaseModel):
+    text: str
+
+class SlowProvider(LLMProvider):
+    def __init__(self, model_name="slow", api_key=None, client=None, delay=10.0):
+        self.model_name = model_name
+        self.delay = delay
+        self.cancelled = 0
+
+    @classmethod
+    def create_client(cls, api_key=None):
+        return None
+
+    async def _generate_json(self, messages, response_model):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return response_model(text="late")
+
+    async def _stream_json(self, messages, response_model):
+        yield response_model.model_construct(text="pa")
+        yield await self._generate_json(messages, response_model)
+
+    async def stream_response(self, messages):
+        yield ""
+
+    async def orchestrate_tools(self, messages, tools):
+        pass
+
+def test_nested_scopes_only_shorten_the_deadline():
+    assert remaining() is None and stage_budget(0.5) is None
+    with deadline_scope(10):
+        with deadline_scope(100):
+            assert remaining() <= 10
+        assert 4 < stage_budget(0.5) <= 5
+        with deadline_scope(100, detached=True):
+            assert remaining() > 10
+    assert remaining() is None
+
+def test_provider_call_stops_at_the_deadline_and_is_cancelled():
+    provider = SlowProvider()
+
+    async def run():
+        with deadline_scope(0.05):
+            await provider.generate_json([{"role": "user", "content": "hi"}], Answer)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert time.monotonic() - started < 1
+    assert provider.cancelled == 1
+
+def test_stream_deadline_applies_between_partials():
+    provider = SlowProvider()
+    received = []
+
+    async def run():
+        with deadline_scope(0.05):
+            async for partial in provider.stream_json([{"role": "user", "content": "hi"}], Answer):
+                received.append(partial.text)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert received == ["pa"]
+    assert provider.cancelled == 1
+
+def test_disconnected_client_cancels_the_work():
+    class DisconnectingRequest:
+        async def is_disconnected(self):
+            return True
+
+    provider = SlowProvider()
+
+    async def run():
+        await cancel_on_disconnect(DisconnectingRequest(), provider.generate_json([{"role": "user", "content": "hi"}], Answer), poll_interval=0.01)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 499
+    assert provider.cancelled == 1
+
+def test_cancelled_search_is_not_retried(monkeypatch):
+    from backend.orchestrator import agent
+
+    class HangingSearch:
+        calls = 0
+
+        async def run(self, query):
+            HangingSearch.calls += 1
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(agent, "search_tool", HangingSearch())
+
+    async def run():
+        task = asyncio.create_task(agent.orchestrator._execute_search_tool("ws", "dom", "q"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=1)
+
+    asyncio.run(run())
+    assert HangingSearch.calls == 1
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+import time
+from backend.api import workspace as workspace_api
+from backend.llm.provider import LLMProvider
+from backend.models.domain import DomainExpansion, DomainQuery
+from backend.orchestrator import agent
+from backend.storage.async_store import AsyncStore
+
+class StreamingProvider(LLMProvider):
+    def __init__(self, model_name="fake", api_key=None, client=None):
+        self.model_name = model_name
+        self.yielded_at = []
+
+    @classmethod
+    def create_client(cls, api_key=None):
+        return None
+
+    async def _generate_json(self, messages, response_model):
+        raise NotImplementedError
+
+    async def _stream_iterable(self, messages, response_model, field):
+        for i in range(3):
+            # Generating each domain takes a while
+            await asyncio.sleep(0.05)
+            self.yielded_at.append(time.monotonic())
+            yield DomainExpansion(id=f"dom_{i}", name=f"Domain {i}", description="d", search_queries=[DomainQuery(query=f"q{i}", rationale="r")], assumptions=[], target_models=[])
+
+    async def stream_response(self, messages):
+        yield ""
+
+    async def orchestrate_tools(self, messages, tools):
+        pass
+
+class NoProfiles:
+    def load_profile(self, username):
+        return None
+
+def test_domains_are_researched_while_still_streaming(monkeypatch):
+    import backend.storage.workspace_manager as wm
+    import backend.orchestrator.jobs as jobs
+
+    for path in ("/tmp/test_ingest_stream.db", "/tmp/test_ingest_stream_jobs.db"):
+        if os.path.exists(path):
+            os.remove(path)
+    wm.WORKSPACE_DB = "/tmp/test_ingest_stream.db"
+    jobs.JOBS_DB = "/tmp/test_ingest_stream_jobs.db"
+    manager = wm.WorkspaceManager()
+    queue = jobs.JobQueue()
+
+    provider = StreamingProvider()
+    searched = {}
+
+    async def fake_search(session_id, domain_id, query):
+        searched[domain_id] = time.monotonic()
+
+    store = AsyncStore(manager, "test-workspace")
+    monkeypatch.setattr(workspace_api, "workspace_store", store)
+    monkeypatch.setattr(agent, "workspace_store", store)
+    queue_store = AsyncStore(queue, "test-jobs")
+    monkeypatch.setattr(workspace_api, "jobs_store", queue_store)
+    monkeypatch.setattr(agent, "jobs_store", queue_store)
+    monkeypatch.setattr(workspace_api.job_worker, "queue", queue_store)
+    monkeypatch.setattr(workspace_api, "profile_store", AsyncStore(NoProfiles(), "test-profiles"))
+    monkeypatch.setattr(workspace_api.provider_registry, "get", lambda model_id: provider)
+    monkeypatch.setattr(agent.orchestrator, "_execute_search_tool", fake_search)
+
+    async def run():
+        req = workspace_api.TaskIngestionRequest(query="q")
+        lines = [json.loads(line) async for line in workspace_api._ingest_stream(req, None)]
+        await asyncio.gather(*workspace_api._research_tasks)
+        return lines
+
+    lines = asyncio.run(run())
+    assert [l["type"] for l in lines] == ["workspace", "domain", "domain", "domain", "done"]
+
+    ws_id = lines[0]["workspace_id"]
+    assert [d["domain_id"] for d in manager.get_workspace(ws_id)["domains"]] == ["dom_0", "dom_1", "dom_2"]
+    # The first domain was researched before the model finished the last one
+    assert searched["dom_0"] < provider.yielded_at[-1]
+    assert set(searched) == {"dom_0", "dom_1", "dom_2"}
+    assert queue.get(lines[0]["job_id"])["state"] == "done"
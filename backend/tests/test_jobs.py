@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+from backend.storage.async_store import AsyncStore
+
+def _queue(path, max_attempts=3):
+    if os.path.exists(path):
+        os.remove(path)
+    import backend.orchestrator.jobs as jobs
+    jobs.JOBS_DB = path
+    return jobs.JobQueue(max_attempts=max_attempts)
+
+def test_enqueue_claim_and_complete():
+    queue = _queue("/tmp/test_jobs.db")
+
+    job = queue.enqueue("ws_1")
+    assert job["state"] == "queued"
+    # An active job is reused for the same workspace
+    assert queue.enqueue("ws_1")["id"] == job["id"]
+
+    claimed = queue.claim("worker-a", lease_seconds=30)
+    assert claimed["id"] == job["id"]
+    assert claimed["state"] == "running"
+    assert claimed["attempts"] == 1
+    assert queue.claim("worker-b", lease_seconds=30) is None
+
+    # Only the worker holding the lease can settle the job
+    assert not queue.complete(job["id"], "worker-b")
+    assert queue.complete(job["id"], "worker-a")
+    assert queue.get(job["id"])["state"] == "done"
+    assert queue.enqueue("ws_1")["id"] != job["id"]
+
+def test_expired_lease_is_reclaimed_with_checkpoints():
+    queue = _queue("/tmp/test_jobs_lease.db", max_attempts=2)
+    job = queue.enqueue("ws_1")
+
+    queue.claim("worker-a", lease_seconds=0.01)
+    queue.checkpoint(job["id"], "dom_1", "first query")
+    time.sleep(0.02)
+
+    reclaimed = queue.claim("worker-b", lease_seconds=0.01)
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["worker_id"] == "worker-b"
+    # The first worker can no longer renew or settle a job it lost
+    assert not queue.heartbeat(job["id"], "worker-a", lease_seconds=30)
+    assert not queue.fail(job["id"], "worker-a", "late failure")
+    assert queue.get(job["id"])["state"] == "running"
+    assert queue.completed_queries(job["id"]) == {("dom_1", "first query")}
+
+    # Out of attempts once the second lease runs out too
+    time.sleep(0.02)
+    assert queue.claim("worker-c", lease_seconds=30) is None
+    assert queue.get(job["id"])["state"] == "failed"
+
+def test_worker_runs_jobs_and_records_failures():
+    queue = _queue("/tmp/test_jobs_worker.db")
+    from backend.orchestrator.jobs import JobWorker
+
+    ok = queue.enqueue("ws_ok")
+    bad = queue.enqueue("ws_bad")
+
+    async def run_job(job):
+        if job["workspace_id"] == "ws_bad":
+            raise RuntimeError("search backend down")
+
+    async def run():
+        worker = JobWorker(AsyncStore(queue, "test-jobs"), run_job, concurrency=2, poll_interval=0.01)
+        worker.start()
+        await asyncio.sleep(0.1)
+        await worker.stop()
+
+    asyncio.run(run())
+    assert queue.get(ok["id"])["state"] == "done"
+    assert queue.get(bad["id"])["state"] == "failed"
+    assert queue.get(bad["id"])["error"] == "search backend down"
+    assert queue.stats()["done"] == 1
+
+def test_stopping_a_worker_requeues_its_job():
+    queue = _queue("/tmp/test_jobs_release.db")
+    from backend.orchestrator.jobs import JobWorker
+    job = queue.enqueue("ws_slow")
+
+    async def run_job(job):
+        await asyncio.sleep(10)
+
+    async def run():
+        worker = JobWorker(AsyncStore(queue, "test-jobs"), run_job, concurrency=1, poll_interval=0.01)
+        worker.start()
+        await asyncio.sleep(0.05)
+        await worker.stop()
+
+    asyncio.run(run())
+    assert queue.get(job["id"])["state"] == "queued"
+
+def test_heartbeat_keeps_renewing_after_a_failure():
+    queue = _queue("/tmp/test_jobs_heartbeat.db")
+    from backend.orchestrator.jobs import JobWorker
+    job = queue.enqueue("ws_1")
+    renewals = []
+
+    class FlakyQueue:
+        def __getattr__(self, name):
+            return getattr(queue, name)
+
+        def heartbeat(self, job_id, worker_id, lease_seconds):
+            renewals.append(job_id)
+            if len(renewals) == 1:
+                raise RuntimeError("database is locked")
+            return queue.heartbeat(job_id, worker_id, lease_seconds)
+
+    async def run_job(job):
+        await asyncio.sleep(0.1)
+
+    async def run():
+        worker = JobWorker(AsyncStore(FlakyQueue(), "test-jobs"), run_job, concurrency=1, lease_seconds=0.03, poll_interval=0.01)
+        claimed = await worker.queue.claim(worker.worker_id, worker.lease_seconds)
+        await worker.run_claimed(claimed, run_job)
+
+    asyncio.run(run())
+    assert len(renewals) > 2
+    assert queue.get(job["id"])["state"] == "done"
+
+def test_concurrent_enqueues_share_one_active_job():
+    path = "/tmp/test_jobs_unique.db"
+    first = _queue(path)
+    import backend.orchestrator.jobs as jobs
+    job = first.enqueue("ws_1")
+
+    # A second instance on the same file whose existence check ran before the first's insert
+    racing = jobs.JobQueue()
+    active_job = racing._active_job
+    checks = []
+
+    def stale_check(workspace_id):
+        checks.append(workspace_id)
+        return None if len(checks) == 1 else active_job(workspace_id)
+
+    racing._active_job = stale_check
+    assert racing.enqueue("ws_1")["id"] == job["id"]
+    assert first.stats()["queued"] == 1
+
+def test_worker_stops_a_job_whose_lease_was_taken_over():
+    queue = _queue("/tmp/test_jobs_lease_lost.db")
+    from backend.orchestrator.jobs import JobWorker, LeaseLost
+    job = queue.enqueue("ws_1")
+    finished = []
+
+    async def run_job(job):
+        await asyncio.sleep(0.05)
+        # The lease lapses and another worker reclaims the job
+        with queue.db.conn:
+            queue.db.execute("update jobs set worker_id = 'worker-b' where id = ?", [job["id"]])
+        await asyncio.sleep(1)
+        finished.append(job["id"])
+
+    async def run():
+        worker = JobWorker(AsyncStore(queue, "test-jobs"), run_job, concurrency=1, lease_seconds=0.06, poll_interval=0.01)
+        claimed = await worker.queue.claim(worker.worker_id, worker.lease_seconds)
+        try:
+            await asyncio.wait_for(worker.run_claimed(claimed, run_job), timeout=0.5)
+        except LeaseLost:
+            return True
+        return False
+
+    assert asyncio.run(run())
+    assert finished == []
+    # The new owner's run is left alone
+    assert queue.get(job["id"])["state"] == "running"
+    assert queue.get(job["id"])["worker_id"] == "worker-b"
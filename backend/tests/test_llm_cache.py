@@ -0,0 +1,61 @@
+import asyncio
+import shutil
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+from backend.llm.cache import LLMResponseCache
+from backend.llm.provider import LLMProvider
+
+class Answer(BaseModel):
+    text: str
+
+class CountingProvider(LLMProvider):
+    def __init__(self, model_name: str = "fake-model", api_key: Optional[str] = None, client: Optional[Any] = None):
+        self.model_name = model_name
+        self.calls = 0
+
+    @classmethod
+    def create_client(cls, api_key: Optional[str] = None) -> Any:
+        return None
+
+    async def _generate_json(self, messages: List[Dict[str, str]], response_model: type[BaseModel]) -> BaseModel:
+        self.calls += 1
+        return response_model(text=f"answer {self.calls}")
+
+    async def stream_response(self, messages):
+        yield ""
+
+    async def orchestrate_tools(self, messages, tools):
+        pass
+
+def _cache(path):
+    shutil.rmtree(path, ignore_errors=True)
+    return LLMResponseCache(directory=path, ttl_seconds=60)
+
+def test_identical_calls_are_served_from_cache():
+    provider = CountingProvider()
+    provider.cache = _cache("/tmp/test_llm_cache")
+    messages = [{"role": "user", "content": "hello"}]
+
+    first = asyncio.run(provider.generate_json(messages, Answer))
+    second = asyncio.run(provider.generate_json(messages, Answer))
+    assert first == second == Answer(text="answer 1")
+    assert provider.calls == 1
+    assert provider.cache.stats()["hits"] == 1
+    assert provider.cache.stats()["misses"] == 1
+
+    # Different messages miss, and bypass always reaches the provider
+    asyncio.run(provider.generate_json([{"role": "user", "content": "bye"}], Answer))
+    asyncio.run(provider.generate_json(messages, Answer, use_cache=False))
+    assert provider.calls == 3
+
+def test_cache_key_covers_model_and_schema():
+    class OtherAnswer(BaseModel):
+        text: str
+        score: int = 0
+
+    messages = [{"role": "user", "content": "hello"}]
+    key = LLMResponseCache.make_key("CountingProvider", "fake-model", messages, Answer)
+    assert key == LLMResponseCache.make_key("CountingProvider", "fake-model", messages, Answer)
+    assert key != LLMResponseCache.make_key("CountingProvider", "other-model", messages, Answer)
+    assert key != LLMResponseCache.make_key("CountingProvider", "fake-model", messages, OtherAnswer)
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import os
+from backend.core.event_bus import MemoryEventBus, SQLiteEventBus
+from backend.core.logger import StreamLogger
+
+def _parse(frames):
+    events = []
+    for frame in frames:
+        id_line, data_line = frame.strip().split("\n")
+        events.append((int(id_line[len("id: "):]), json.loads(data_line[len("data: "):])))
+    return events
+
+async def _collect(logger, session_id, last_event_id=0):
+    return _parse([f async for f in logger.stream_events(session_id, last_event_id)])
+
+def test_every_subscriber_sees_every_event():
+    async def run():
+        logger = StreamLogger(MemoryEventBus(max_events=100))
+        await logger.open_session("s1")
+        first = asyncio.create_task(_collect(logger, "s1"))
+        second = asyncio.create_task(_collect(logger, "s1"))
+        await asyncio.sleep(0)
+
+        for i in range(3):
+            await logger.log_event("s1", "thought", {"message": f"m{i}"})
+            await asyncio.sleep(0)
+        await logger.finish_stream("s1")
+        return await first, await second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert [i for i, _ in first] == [1, 2, 3, 4]
+    assert first[-1][1]["type"] == "DONE"
+
+def test_reconnect_replays_only_missed_events():
+    async def run():
+        logger = StreamLogger(MemoryEventBus(max_events=100))
+        await logger.open_session("s1")
+        for i in range(3):
+            await logger.log_event("s1", "thought", {"message": f"m{i}"})
+        await logger.finish_stream("s1")
+        return await _collect(logger, "s1", last_event_id=2), await _collect(logger, "s1", last_event_id=4)
+
+    resumed, after_done = asyncio.run(run())
+    assert [(i, e["type"]) for i, e in resumed] == [(3, "thought"), (4, "DONE")]
+    assert resumed[0][1]["payload"]["message"] == "m2"
+    assert after_done == []
+
+def test_new_run_continues_event_ids():
+    async def run():
+        logger = StreamLogger(MemoryEventBus(max_events=100))
+        await logger.open_session("s1")
+        await logger.log_event("s1", "status", {"message": "run 1"})
+        await logger.finish_stream("s1")
+
+        await logger.open_session("s1")
+        await logger.log_event("s1", "status", {"message": "run 2"})
+        await logger.finish_stream("s1")
+        return await _collect(logger, "s1")
+
+    events = asyncio.run(run())
+    assert [i for i, _ in events] == [3, 4]
+    assert events[0][1]["payload"]["message"] == "run 2"
+
+def test_overflow_policies_bound_each_session():
+    async def run(policy):
+        logger = StreamLogger(MemoryEventBus(max_events=3, overflow_policy=policy))
+        await logger.open_session("s1")
+        for i in range(5):
+            await logger.log_event("s1", "thought", {"message": f"m{i}"})
+        await logger.finish_stream("s1")
+        return await logger.history("s1"), await logger.stats()
+
+    oldest, _ = asyncio.run(run("drop_oldest"))
+    assert [e["payload"]["message"] for _, e in oldest[:-1]] == ["m3", "m4"]
+    assert oldest[-1][1]["type"] == "DONE"
+
+    newest, stats = asyncio.run(run("drop_newest"))
+    # The DONE marker always gets through, even past the cap
+    assert [e.get("type") for _, e in newest] == ["thought", "thought", "thought", "DONE"]
+    assert stats["dropped_events"] == 2
+    assert stats["buffered_events"] == 4
+
+def test_sessions_are_evicted_by_ttl_and_cap():
+    async def run():
+        logger = StreamLogger(MemoryEventBus(max_sessions=2, finished_ttl=0, idle_ttl=3600))
+        await logger.open_session("finished")
+        await logger.log_event("finished", "status", {"message": "x"})
+        await logger.finish_stream("finished")
+        await logger.open_session("live")
+
+        await logger.sweep()
+        assert set(logger.bus.sessions) == {"live"}
+
+        await logger.open_session("a")
+        # Live runs are never evicted to make room, the cap is exceeded instead
+        await logger.open_session("b")
+        assert set(logger.bus.sessions) == {"live", "a", "b"}
+
+        # At the cap the least recently active finished run makes room
+        await logger.finish_stream("a")
+        await logger.finish_stream("b")
+        await logger.open_session("c")
+        assert set(logger.bus.sessions) == {"live", "c"}
+        stats = await logger.stats()
+        assert stats["evicted_sessions"] == 3
+
+        # Subscribing to an unknown id neither creates a session nor takes a slot
+        assert await _collect(logger, "unknown") == []
+        assert "unknown" not in logger.bus.sessions
+
+    asyncio.run(run())
+
+def _sqlite_bus(path):
+    if os.path.exists(path):
+        os.remove(path)
+    return SQLiteEventBus(path, poll_interval=0.02)
+
+def test_sqlite_bus_streams_events_across_instances():
+    path = "/tmp/test_events.db"
+    publisher = StreamLogger(_sqlite_bus(path))
+    # A second bus on the same file stands in for another uvicorn worker
+    subscriber = StreamLogger(SQLiteEventBus(path, poll_interval=0.02))
+
+    async def run():
+        await publisher.open_session("s1")
+        follower = asyncio.create_task(_collect(subscriber, "s1"))
+        await asyncio.sleep(0.05)
+        for i in range(3):
+            await publisher.log_event("s1", "thought", {"message": f"m{i}"})
+        await publisher.finish_stream("s1")
+        events = await asyncio.wait_for(follower, timeout=2)
+        return events, await _collect(subscriber, "s1", last_event_id=events[1][0])
+
+    events, resumed = asyncio.run(run())
+    assert [e["type"] for _, e in events] == ["thought", "thought", "thought", "DONE"]
+    assert resumed == events[2:]
+
+def test_sqlite_bus_new_run_and_sweep():
+    path = "/tmp/test_events_sweep.db"
+    bus = _sqlite_bus(path)
+    logger = StreamLogger(bus)
+
+    async def run():
+        await logger.open_session("s1")
+        await logger.log_event("s1", "status", {"message": "run 1"})
+        await logger.finish_stream("s1")
+        await logger.open_session("s1")
+        await logger.log_event("s1", "status", {"message": "run 2"})
+        await logger.finish_stream("s1")
+        events = await _collect(logger, "s1")
+
+        bus.store.manager.finished_ttl = -1
+        await logger.sweep()
+        assert not await bus.has_session("s1")
+        assert (await logger.stats())["buffered_events"] == 0
+        return events
+
+    events = asyncio.run(run())
+    assert [e.get("payload", {}).get("message") for _, e in events] == ["run 2", None]
+    assert events[0][0] > 2
+
+def test_sqlite_bus_caps_events_on_publish_and_releases_wakeups():
+    bus = _sqlite_bus("/tmp/test_events_cap.db")
+    bus.store.manager.max_events = 3
+    logger = StreamLogger(bus)
+
+    async def run():
+        await logger.open_session("s1")
+        follower = asyncio.create_task(_collect(logger, "s1"))
+        await asyncio.sleep(0.05)
+        for i in range(5):
+            await logger.log_event("s1", "thought", {"message": f"m{i}"})
+        assert (await logger.stats())["buffered_events"] == 3
+        await logger.finish_stream("s1")
+        await asyncio.wait_for(follower, timeout=2)
+
+        assert await _collect(logger, "unknown") == []
+        assert not await bus.has_session("unknown")
+        return [e["payload"]["message"] for _, e in (await logger.history("s1"))[:-1]]
+
+    assert asyncio.run(run()) == ["m3", "m4"]
+    assert bus._wakeups == {} and bus._subscribers == {}
+
+def test_background_sweeper_evicts_expired_sessions():
+    async def run():
+        logger = StreamLogger(MemoryEventBus(finished_ttl=0, idle_ttl=3600))
+        await logger.open_session("s1")
+        await logger.finish_stream("s1")
+        logger.start(sweep_interval=0.01)
+        await asyncio.sleep(0.05)
+        await logger.stop()
+        return set(logger.bus.sessions)
+
+    assert asyncio.run(run()) == set()
@@ -0,0 +1,27 @@
+import os
+import shutil
+import pytest
+from backend.llm.prompts import PromptRegistry, prompt_registry, render_domain_deep_dive
+
+def test_registry_renders_and_versions_prompts():
+    prompt = render_domain_deep_dive("A hobbyist")
+    assert "{" not in prompt
+    assert prompt.endswith("\nUser Profile:\nA hobbyist")
+
+    versions = prompt_registry.versions()
+    assert set(versions) == {"domain_expansion", "domain_deep_dive", "synthesis"}
+    assert len(set(versions.values())) == 3
+
+    with pytest.raises(ValueError):
+        prompt_registry.get("domain_deep_dive").render(domain_name="Inference Serving")
+
+def test_registry_rejects_templates_with_unexpected_placeholders():
+    prompts_dir = "/tmp/test_prompts"
+    shutil.rmtree(prompts_dir, ignore_errors=True)
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "../prompts"), prompts_dir)
+    assert PromptRegistry(prompts_dir).versions() == prompt_registry.versions()
+
+    with open(os.path.join(prompts_dir, "synthesis.md"), "a") as f:
+        f.write("\nAudience: {audience}\n")
+    with pytest.raises(ValueError):
+        PromptRegistry(prompts_dir)
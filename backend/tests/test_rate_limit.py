@@ -0,0 +1,124 @@
+import asyncio
+import anthropic
+import httpx
+import pytest
+from backend.core.deadline import DeadlineExceeded, deadline_scope
+from backend.llm.rate_limit import AdaptiveLimiter, rate_limit_delay
+
+def _rate_limit_error(retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"))
+    return anthropic.RateLimitError("rate limited", response=response, body=None)
+
+def test_rate_limit_delay_finds_wrapped_429s():
+    try:
+        try:
+            raise _rate_limit_error("3")
+        except Exception as e:
+            raise ValueError(f"Anthropic LLM call failed: {e}")
+    except ValueError as wrapped:
+        assert rate_limit_delay(wrapped) == 3.0
+    assert rate_limit_delay(ValueError("bad json")) is None
+
+def test_concurrency_is_capped_and_queue_depth_reported():
+    limiter = AdaptiveLimiter("test/model", requests_per_minute=0, tokens_per_minute=0, max_concurrency=2)
+    peak = {"in_flight": 0}
+
+    async def call():
+        async with limiter.slot(10):
+            peak["in_flight"] = max(peak["in_flight"], limiter.in_flight)
+            await asyncio.sleep(0.02)
+
+    async def run():
+        calls = asyncio.gather(*[call() for _ in range(6)])
+        await asyncio.sleep(0.005)
+        assert limiter.stats()["queued"] == 4
+        await calls
+
+    asyncio.run(run())
+    assert peak["in_flight"] == 2
+    assert limiter.stats()["in_flight"] == 0 and limiter.stats()["queued"] == 0
+
+def test_429s_halve_concurrency_once_per_round_and_pause_callers():
+    limiter = AdaptiveLimiter("test/model", requests_per_minute=0, tokens_per_minute=0, max_concurrency=8)
+
+    async def rejected():
+        async with limiter.slot(10):
+            await asyncio.sleep(0.01)
+            raise _rate_limit_error("0.05")
+
+    async def run():
+        # Four calls in flight hit the limit together: one cut, not four
+        results = await asyncio.gather(*[rejected() for _ in range(4)], return_exceptions=True)
+        assert all(isinstance(r, anthropic.RateLimitError) for r in results)
+        assert limiter.limit == 4
+        assert limiter.stats()["paused_seconds"] > 0
+
+        started = asyncio.get_running_loop().time()
+        async with limiter.slot(10):
+            pass
+        # Queued calls wait out the Retry-After instead of hammering the provider
+        assert asyncio.get_running_loop().time() - started >= 0.03
+
+    asyncio.run(run())
+    assert limiter.stats()["rate_limited"] == 4
+    # Additive increase after a success
+    assert 4 < limiter.limit < 5
+
+def test_token_budget_wait_counts_against_the_deadline():
+    limiter = AdaptiveLimiter("test/model", requests_per_minute=0, tokens_per_minute=60, max_concurrency=4)
+
+    async def run():
+        async with limiter.slot(60):
+            pass
+        with deadline_scope(0.05):
+            # The bucket is empty and refills at one token per second
+            async with limiter.slot(30):
+                pass
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+    assert limiter.in_flight == 0
+    assert limiter.tokens.level > -1
+
+def test_providers_retry_429s_after_the_pause():
+    from pydantic import BaseModel
+    from backend.llm.provider import LLMProvider
+
+    class Answer(BaseModel):
+        text: str
+
+    class FlakyProvider(LLMProvider):
+        provider_name = "test-retry"
+
+        def __init__(self, model_name="model", api_key=None, client=None):
+            self.model_name = model_name
+            self.calls = 0
+
+        @classmethod
+        def create_client(cls, api_key=None):
+            return None
+
+        async def _generate_json(self, messages, response_model):
+            self.calls += 1
+            if self.calls == 1:
+                raise _rate_limit_error("0.02")
+            return response_model(text="ok")
+
+        async def stream_response(self, messages):
+            yield ""
+
+        async def orchestrate_tools(self, messages, tools):
+            return {}
+
+    provider = FlakyProvider()
+    answer = asyncio.run(provider.generate_json([{"role": "user", "content": "hi"}], Answer))
+    assert answer.text == "ok" and provider.calls == 2
+    assert provider.rate_limiter.stats()["rate_limited"] == 1
+
+    streamed = FlakyProvider("stream-model")
+
+    async def stream():
+        return [item async for item in streamed.stream_json([{"role": "user", "content": "hi"}], Answer)]
+
+    assert [a.text for a in asyncio.run(stream())] == ["ok"] and streamed.calls == 2
@@ -0,0 +1,33 @@
+import asyncio
+from backend.llm.registry import ProviderRegistry
+from backend.llm.anthropic_provider import AnthropicProvider
+from backend.llm.openai_provider import OpenAIProvider
+from backend.llm.gemini import GeminiProvider
+
+def test_registry_routes_and_maps_models():
+    assert ProviderRegistry.provider_class("claude-sonnet-4-6") is AnthropicProvider
+    assert ProviderRegistry.provider_class("gpt-5.2-2025-12-11") is OpenAIProvider
+    assert ProviderRegistry.provider_class("gemini-3-pro-preview") is GeminiProvider
+    assert ProviderRegistry.resolve_model("claude-sonnet-4-6") == "claude-3-haiku-20240307"
+    assert ProviderRegistry.resolve_model("gpt-5.2-2025-12-11") == "gpt-5.2-2025-12-11"
+
+def test_registry_shares_providers_and_clients(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    registry = ProviderRegistry()
+
+    haiku = registry.get("claude-haiku-4-5")
+    # Aliases resolving to the same model share one provider
+    assert registry.get("claude-sonnet-4-6") is haiku
+    assert haiku.model_name == "claude-3-haiku-20240307"
+
+    opus = registry.get("claude-opus-4")
+    assert opus is not haiku
+    assert opus.client.client is haiku.client.client
+
+    asyncio.run(registry.aclose())
+    assert registry.get("claude-haiku-4-5") is not haiku
+
+def test_registry_warm_reports_missing_keys(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    errors = ProviderRegistry().warm(["gpt-5.2-2025-12-11"])
+    assert "OpenAI API Key not found" in errors["gpt-5.2-2025-12-11"]
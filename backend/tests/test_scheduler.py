@@ -0,0 +1,91 @@
+import asyncio
+import time
+from backend.core.logger import stream_logger
+from backend.orchestrator.scheduler import RESUMED, ResearchScheduler
+
+def _domains(n_domains, n_queries):
+    return [
+        {
+            "domain_id": f"dom_{d}",
+            "name": f"Domain {d}",
+            "search_queries": [{"query": f"q{d}-{i}", "rationale": "r"} for i in range(n_queries)],
+        }
+        for d in range(n_domains)
+    ]
+
+def test_scheduler_runs_queries_concurrently_within_caps():
+    session_id = "test-scheduler"
+    in_flight = {"global": 0, "peak": 0}
+    per_domain = {}
+    per_domain_peak = {}
+
+    async def execute(domain, q):
+        key = domain["domain_id"]
+        in_flight["global"] += 1
+        per_domain[key] = per_domain.get(key, 0) + 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["global"])
+        per_domain_peak[key] = max(per_domain_peak.get(key, 0), per_domain[key])
+        # Later queries finish first to exercise ordered reporting
+        await asyncio.sleep(0.05 if q["query"].endswith("-0") else 0.01)
+        in_flight["global"] -= 1
+        per_domain[key] -= 1
+
+    async def run():
+        await stream_logger.open_session(session_id)
+        scheduler = ResearchScheduler(session_id, execute, asyncio.Semaphore(6), max_per_domain=2)
+        started = time.monotonic()
+        summaries = await scheduler.run(_domains(5, 4))
+        elapsed = time.monotonic() - started
+
+        events = [e for _, e in await stream_logger.history(session_id)]
+        await stream_logger.close_session(session_id)
+        return summaries, elapsed, events
+
+    summaries, elapsed, events = asyncio.run(run())
+
+    assert in_flight["peak"] <= 6
+    assert max(per_domain_peak.values()) <= 2
+    # 20 queries serially would take well over 0.3s
+    assert elapsed < 0.3
+    assert [s["completed"] for s in summaries] == [4] * 5
+    assert all(s["failed"] == 0 for s in summaries)
+
+    # Results of each domain are reported in dispatch order
+    results = [e["payload"]["query"] for e in events if e["type"] == "tool_result"]
+    for d in range(5):
+        assert [q for q in results if q.startswith(f"q{d}-")] == [f"q{d}-{i}" for i in range(4)]
+
+def test_scheduler_reports_failed_queries():
+    async def execute(domain, q):
+        if q["query"] == "q0-1":
+            raise RuntimeError("boom")
+
+    async def run():
+        scheduler = ResearchScheduler("test-scheduler-fail", execute, asyncio.Semaphore(4), max_per_domain=4)
+        return await scheduler.run(_domains(1, 3))
+
+    summaries = asyncio.run(run())
+    assert summaries[0]["completed"] == 2
+    assert summaries[0]["failed"] == 1
+
+def test_scheduler_reports_resumed_queries_separately():
+    session_id = "test-scheduler-resume"
+
+    async def execute(domain, q):
+        # The first query was checkpointed by an earlier attempt of the job
+        if q["query"] == "q0-0":
+            return RESUMED
+
+    async def run():
+        await stream_logger.open_session(session_id)
+        scheduler = ResearchScheduler(session_id, execute, asyncio.Semaphore(4), max_per_domain=4)
+        summaries = await scheduler.run(_domains(1, 3))
+        events = [e for _, e in await stream_logger.history(session_id)]
+        await stream_logger.close_session(session_id)
+        return summaries, events
+
+    summaries, events = asyncio.run(run())
+    assert (summaries[0]["completed"], summaries[0]["resumed"], summaries[0]["failed"]) == (2, 1, 0)
+    statuses = {e["payload"]["query"]: e["payload"]["status"] for e in events if e["type"] == "tool_result"}
+    assert statuses["q0-0"].startswith("Skipped")
+    assert statuses["q0-1"].startswith("Success")
@@ -0,0 +1,87 @@
+import asyncio
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from backend.orchestrator.search_tool import HttpSearchTool, extract_html
+
+PAGES = {
+    "/page1": "<html><head><title>Page One</title><style>p {}</style></head><body><p>Quantized models &amp; tradeoffs</p><script>x()</script></body></html>",
+    "/page2": "<html><head><title>Page Two</title></head><body><p>Distillation notes</p></body></html>",
+    "/big": "<html><body><p>" + "x" * 50_000 + "</p></body></html>",
+}
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        FixtureHandler.requests.append((self.path, self.headers.get("If-None-Match")))
+        port = self.server.server_address[1]
+        if self.path.startswith("/search"):
+            # Results live on another host name so they are not mistaken for search-page links
+            links = "".join(f'<a href="http://localhost:{port}{p}">{p}</a>' for p in PAGES) + '<a href="/about">About</a>'
+            return self._send(200, f"<html><body>{links}</body></html>")
+        body = PAGES.get(self.path)
+        if body is None:
+            return self._send(404, "missing")
+        etag = f'"{self.path}-v1"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, "", etag=etag)
+        self._send(200, body, etag=etag)
+
+    def _send(self, status, body, etag=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if etag:
+            self.send_header("ETag", etag)
+        if status != 304:
+            self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def test_extract_html_skips_scripts_and_styles():
+    title, text, links = extract_html(PAGES["/page1"])
+    assert title == "Page One"
+    assert text == "Quantized models & tradeoffs"
+    assert links == []
+
+def test_http_tool_fetches_results_with_cap_and_revalidation():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    cache_dir = "/tmp/test_page_cache"
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    FixtureHandler.requests = []
+
+    async def run():
+        tool = HttpSearchTool(f"http://127.0.0.1:{port}/search?q={{query}}", max_results=3, max_bytes=1_000, cache_dir=cache_dir)
+        try:
+            first = await tool.run("small models")
+            second = await tool.run("small models")
+            # Per-host limits are released once a host has nothing in flight
+            assert tool._host_slots == {} and tool._host_users == {}
+        finally:
+            await tool.aclose()
+        return first, second
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert [p.title for p in first[:2]] == ["Page One", "Page Two"]
+    assert not any(p.from_cache for p in first)
+    big = first[2]
+    assert big.truncated and len(big.text) < 1_000
+
+    # The second run revalidates every page and gets 304s back
+    assert all(p.from_cache for p in second)
+    assert [p.text for p in second] == [p.text for p in first]
+    revalidations = [path for path, etag in FixtureHandler.requests if etag]
+    assert sorted(revalidations) == ["/big", "/page1", "/page2"]
+    # The relative About link points back at the search host and is not a result
+    assert "/about" not in [path for path, _ in FixtureHandler.requests]
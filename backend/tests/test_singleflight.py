@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from backend.core.singleflight import SingleFlight, StreamFlight
+
+def test_concurrent_duplicates_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def work(tag):
+        calls.append(tag)
+        await asyncio.sleep(0.02)
+        return f"result {len(calls)}"
+
+    async def run():
+        results = await asyncio.gather(*[flight.do("ws_1", lambda: work("a")) for _ in range(5)])
+        other = await flight.do("ws_2", lambda: work("b"))
+        again = await flight.do("ws_1", lambda: work("c"))
+        return results, other, again
+
+    results, other, again = asyncio.run(run())
+    assert results == ["result 1"] * 5
+    assert other == "result 2"
+    # Once the first call finished a new one starts
+    assert again == "result 3"
+    assert calls == ["a", "b", "c"]
+
+def test_errors_propagate_to_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(*[flight.do("k", fail) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight() == 0
+
+def test_work_is_cancelled_only_when_every_waiter_leaves():
+    flight = SingleFlight()
+    state = {"cancelled": False}
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def run():
+        first = asyncio.create_task(flight.do("k", slow))
+        second = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not state["cancelled"]
+
+        second.cancel()
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    asyncio.run(run())
+    assert state["cancelled"]
+    assert flight.in_flight() == 0
+
+def test_streams_share_one_producer_and_late_joiners_replay():
+    flight = StreamFlight()
+    runs = []
+
+    async def produce():
+        runs.append(1)
+        for i in range(3):
+            await asyncio.sleep(0.02)
+            yield i
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [e async for e in flight.stream("k", produce)]
+
+    async def run():
+        return await asyncio.gather(collect(0), collect(0.03))
+
+    first, late = asyncio.run(run())
+    assert first == late == [0, 1, 2]
+    assert runs == [1]
+    assert flight.in_flight() == 0
+
+def test_stream_producer_is_cancelled_when_every_subscriber_leaves():
+    flight = StreamFlight()
+    state = {"cancelled": False}
+
+    async def produce():
+        try:
+            yield "start"
+            await asyncio.sleep(1)
+            yield "never"
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def follow(seen):
+        async for event in flight.stream("k", produce):
+            seen.append(event)
+
+    async def run():
+        seen_a, seen_b = [], []
+        first = asyncio.create_task(follow(seen_a))
+        second = asyncio.create_task(follow(seen_b))
+        await asyncio.sleep(0.01)
+        assert seen_a == seen_b == ["start"]
+
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not state["cancelled"]
+
+        second.cancel()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert state["cancelled"]
+    assert flight.in_flight() == 0
@@ -0,0 +1,68 @@
+import asyncio
+import os
+import threading
+from backend.storage.async_store import AsyncStore
+from backend.storage.sqlite import ConnectionFactory
+
+def _factory(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return ConnectionFactory(path)
+
+def test_connections_are_tuned_and_per_thread():
+    factory = _factory("/tmp/test_sqlite_factory.db")
+    db = factory.db
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # NORMAL
+    assert db.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert db.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert factory.db is db
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(factory.db))
+    thread.start()
+    thread.join()
+    assert other[0] is not db
+    factory.close()
+
+def test_readers_are_not_blocked_by_an_open_write():
+    factory = _factory("/tmp/test_sqlite_wal.db")
+    factory.db["items"].insert({"id": 1, "name": "committed"}, pk="id")
+
+    # Hold a write transaction open on this thread's connection
+    factory.db.execute("BEGIN IMMEDIATE")
+    factory.db.execute("INSERT INTO items (id, name) VALUES (2, 'pending')")
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.extend(r["name"] for r in factory.db["items"].rows))
+    thread.start()
+    thread.join(timeout=2)
+    factory.db.execute("COMMIT")
+
+    assert seen == ["committed"]
+    factory.close()
+
+def test_store_reads_do_not_queue_behind_writes():
+    release = threading.Event()
+
+    class Manager:
+        def slow_write(self):
+            release.wait(timeout=2)
+            return "written"
+
+        def read(self):
+            return "read"
+
+    store = AsyncStore(Manager(), "test-rw", reads={"read"}, read_workers=2)
+
+    async def run():
+        write = asyncio.ensure_future(store.slow_write())
+        # Served by the read pool while the writer thread is still busy
+        assert await asyncio.wait_for(store.read(), timeout=1) == "read"
+        assert not write.done()
+        release.set()
+        assert await write == "written"
+
+    asyncio.run(run())
+    store.shutdown()
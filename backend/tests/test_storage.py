@@ -24,7 +24,7 @@ def test_workspace_creation():
         target_models=[]
     )
     
-    ws_id = manager.create_workspace("Test user query", [d])
+    ws_id = manager.create_workspace(None, "Test user query", [d])
     assert ws_id is not None
     
     ws = manager.get_workspace(ws_id)
@@ -39,3 +39,148 @@ def test_workspace_creation():
     queries = domains[0]["search_queries"]
     assert len(queries) == 1
     assert queries[0]["query"] == "Test search"
+
+def test_synthesis_cache_keyed_by_fingerprint():
+    db_path = "/tmp/test_workspace_syntheses.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    import backend.storage.workspace_manager as wm
+    wm.WORKSPACE_DB = db_path
+    manager = wm.WorkspaceManager()
+
+    ws_id = manager.create_workspace(None, "Test user query", [])
+    assert manager.get_synthesis(ws_id, "fp-1") is None
+
+    manager.save_synthesis(ws_id, "fp-1", "claude-sonnet-4-6", json.dumps({"summary": "v1"}))
+    assert json.loads(manager.get_synthesis(ws_id, "fp-1"))["summary"] == "v1"
+    # Any change in inputs produces a new fingerprint and misses
+    assert manager.get_synthesis(ws_id, "fp-2") is None
+
+    manager.save_synthesis(ws_id, "fp-2", "claude-sonnet-4-6", json.dumps({"summary": "v2"}))
+    assert manager.get_synthesis(ws_id, "fp-1") is None
+    assert json.loads(manager.get_synthesis(ws_id, "fp-2"))["summary"] == "v2"
+
+def test_deep_dive_artifacts_are_per_domain():
+    db_path = "/tmp/test_workspace_deep_dives.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    import backend.storage.workspace_manager as wm
+    wm.WORKSPACE_DB = db_path
+    manager = wm.WorkspaceManager()
+
+    ws_id = manager.create_workspace(None, "Test user query", [])
+    manager.save_deep_dive(ws_id, "dom_1", "fp-a", "### Deep Dive: A")
+    manager.save_deep_dive(ws_id, "dom_2", "fp-b", "### Deep Dive: B")
+
+    assert manager.get_deep_dive(ws_id, "dom_1", "fp-a") == "### Deep Dive: A"
+    assert manager.get_deep_dive(ws_id, "dom_2", "fp-b") == "### Deep Dive: B"
+
+    # Refreshing one domain leaves the other untouched
+    manager.save_deep_dive(ws_id, "dom_1", "fp-a2", "### Deep Dive: A v2")
+    assert manager.get_deep_dive(ws_id, "dom_1", "fp-a") is None
+    assert manager.get_deep_dive(ws_id, "dom_1", "fp-a2") == "### Deep Dive: A v2"
+    assert manager.get_deep_dive(ws_id, "dom_2", "fp-b") == "### Deep Dive: B"
+
+def test_knowledge_base_retrieval_is_scoped_and_ranked():
+    db_path = "/tmp/test_knowledge.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    import backend.storage.knowledgebase as kb
+    kb.KNOWLEDGE_DB = db_path
+    base = kb.KnowledgeBase()
+
+    base.insert_document("ws_1", "dom_1", "Serving", "vLLM paged attention throughput for inference serving", "https://a")
+    base.insert_document("ws_1", "dom_1", "Misc", "Unrelated notes about office furniture", "https://b")
+    base.insert_document("ws_1", "dom_1", "Batching", "Continuous batching improves inference throughput", "https://c")
+    base.insert_document("ws_1", "dom_2", "Serving", "Inference serving in another domain", "https://d")
+    base.insert_document("ws_2", "dom_1", "Serving", "Inference serving in another workspace", "https://e")
+
+    docs = base.retrieve("ws_1", "dom_1", ["inference throughput", "paged attention"], limit=5)
+    assert [d["source_url"] for d in docs] == ["https://a", "https://c"]
+
+    # Only the workspace and domain filters apply when nothing matches
+    fallback = base.retrieve("ws_1", "dom_2", ["quantum"], limit=5)
+    assert [d["source_url"] for d in fallback] == ["https://d"]
+
+    assert len(base.retrieve("ws_1", None, ["inference"], limit=10)) == 3
+
+def test_document_writer_batches_concurrent_writes():
+    import asyncio
+    from backend.storage.async_store import AsyncStore
+    db_path = "/tmp/test_knowledge_writer.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    import backend.storage.knowledgebase as kb
+    kb.KNOWLEDGE_DB = db_path
+    base = kb.KnowledgeBase()
+    writer = kb.DocumentWriter(AsyncStore(base, "test-knowledge"), max_batch=10, max_delay=0.01)
+
+    def doc(i):
+        return {"workspace_id": "ws_1", "domain_id": "dom_1", "title": f"Doc {i}", "content": f"batched inference notes {i}", "source_url": f"https://{i}"}
+
+    async def run():
+        # 25 writers of one document each: two full batches, then a timed flush
+        await asyncio.gather(*[writer.write([doc(i)]) for i in range(25)])
+
+    asyncio.run(run())
+    assert writer.stats() == {"pending_documents": 0, "batches": 3, "documents": 25}
+    assert base.db["documents"].count == 25
+    # FTS rows were written in the same transactions
+    assert len(base.retrieve("ws_1", "dom_1", ["batched"], limit=30)) == 25
+
+def test_document_writer_flush_waits_for_running_commits():
+    import asyncio
+    import backend.storage.knowledgebase as kb
+
+    class SlowStore:
+        def __init__(self):
+            self.inserted = []
+
+        async def insert_documents(self, documents):
+            await asyncio.sleep(0.05)
+            self.inserted.extend(documents)
+
+    store = SlowStore()
+    writer = kb.DocumentWriter(store, max_batch=2, max_delay=10)
+
+    async def run():
+        # A full batch starts committing, and its writer gives up waiting
+        abandoned = asyncio.create_task(writer.write([{"id": 1}, {"id": 2}]))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await writer.flush()
+        return len(store.inserted)
+
+    assert asyncio.run(run()) == 2
+    assert writer.stats()["batches"] == 1
+
+def test_profile_cache_tracks_file_changes():
+    import shutil
+    import backend.storage.profile_manager as pm
+    profile_dir = "/tmp/test_profiles"
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    pm.PROFILE_DIR = profile_dir
+    manager = pm.ProfileManager()
+
+    manager.save_profile("alice", "Builds agents", {"experience": "Senior", "focus": "Agents"})
+    profile = manager.load_profile("alice")
+    assert profile["metadata"]["traits"]["focus"] == "Agents"
+    # Edits to a returned profile never leak into the cache
+    profile["metadata"]["traits"].clear()
+    assert manager.load_profile("alice")["metadata"]["traits"]["experience"] == "Senior"
+
+    assert manager.delete_trait("alice", "focus")
+    assert "focus" not in manager.load_profile("alice")["metadata"]["traits"]
+    assert [f for f in os.listdir(profile_dir) if f.startswith(".profile-")] == []
+
+    # A file changed behind the cache's back is re-read
+    with open(manager.get_profile_path("alice"), "w") as f:
+        f.write("Edited by hand, no frontmatter")
+    assert manager.load_profile("alice") == {"metadata": {}, "body": "Edited by hand, no frontmatter"}
+
+    manager.reset_profile("alice")
+    assert manager.load_profile("alice") is None
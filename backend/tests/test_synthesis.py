@@ -0,0 +1,101 @@
+import asyncio
+import os
+from backend.api import synthesis
+from backend.llm.provider import LLMProvider
+from backend.models.domain import DomainExpansion, DomainQuery
+from backend.models.synthesis import SynthesisResponse
+from backend.storage.async_store import AsyncStore
+
+class FakeProvider(LLMProvider):
+    def __init__(self, model_name="fake", api_key=None, client=None):
+        self.model_name = model_name
+        self.calls = 0
+
+    @classmethod
+    def create_client(cls, api_key=None):
+        return None
+
+    async def _generate_json(self, messages, response_model):
+        self.calls += 1
+        if response_model is synthesis.DomainDeepDive:
+            # The first domain is the slowest
+            slow = "Domain 0" in messages[1]["content"]
+            await asyncio.sleep(0.1 if slow else 0.01)
+            return response_model(deep_dive_markdown="notes")
+        return SynthesisResponse(summary="done", ranked_models=[], pareto_data=[], historical_timeline=[], implementation_timeline=[])
+
+    async def _stream_json(self, messages, response_model):
+        yield response_model.model_construct(summary="do")
+        yield await self._generate_json(messages, response_model)
+
+    async def stream_response(self, messages):
+        yield ""
+
+    async def orchestrate_tools(self, messages, tools):
+        pass
+
+class EmptyKnowledgeBase:
+    def retrieve(self, workspace_id, domain_id, queries, limit=8):
+        return []
+
+class NoProfiles:
+    def load_profile(self, username):
+        return None
+
+def _setup(monkeypatch):
+    db_path = "/tmp/test_synthesis_stream.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    import backend.storage.workspace_manager as wm
+    wm.WORKSPACE_DB = db_path
+    manager = wm.WorkspaceManager()
+    provider = FakeProvider()
+    monkeypatch.setattr(synthesis, "workspace_store", AsyncStore(manager, "test-workspace"))
+    monkeypatch.setattr(synthesis, "knowledge_store", AsyncStore(EmptyKnowledgeBase(), "test-knowledge"))
+    monkeypatch.setattr(synthesis, "profile_store", AsyncStore(NoProfiles(), "test-profiles"))
+    monkeypatch.setattr(synthesis.provider_registry, "get", lambda model_id: provider)
+
+    domains = [
+        DomainExpansion(id=f"dom_{i}", name=f"Domain {i}", description="d", search_queries=[DomainQuery(query="q", rationale="r")], assumptions=[], target_models=[])
+        for i in range(3)
+    ]
+    ws_id = manager.create_workspace(None, "query", domains)
+    return manager.get_workspace(ws_id), provider
+
+def test_stream_emits_deep_dives_as_they_finish(monkeypatch):
+    ws, provider = _setup(monkeypatch)
+
+    async def collect():
+        return [e async for e in synthesis._synthesis_events(ws["id"], ws, "anonymous", stream_final=True)]
+
+    events = asyncio.run(collect())
+    types = [e["type"] for e in events]
+    assert types == ["deep_dive"] * 3 + ["synthesis_partial"] * 2 + ["synthesis"]
+    # The slow first domain arrives last but keeps its place in the appendix
+    assert [e["index"] for e in events[:3]][-1] == 0
+    assert events[3]["synthesis"]["summary"] == "do"
+
+    final = events[-1]["synthesis"]
+    assert final.summary == "done"
+    assert final.appendix.index("Domain 0") < final.appendix.index("Domain 1")
+
+    # A repeat run is answered from the stored synthesis at once
+    calls = provider.calls
+    events = asyncio.run(collect())
+    assert [e["type"] for e in events] == ["synthesis"]
+    assert events[0]["cached"] is True
+    assert provider.calls == calls
+
+def test_prompt_sizes_are_recorded_for_metrics():
+    from backend.llm.usage import prompt_usage
+    prompt_usage.reset()
+    chunks = ["alpha " * 100, "beta " * 100, "gamma " * 100, "delta " * 100]
+    synthesis._build_messages("deep_dive", "Deep dive (AI)", "system", "prefix ", chunks, " suffix", budget=403)
+    synthesis._build_messages("deep_dive", "Deep dive (Web)", "system", "prefix ", ["one"], " suffix", budget=403)
+
+    stats = prompt_usage.stats()["deep_dive"]
+    assert stats["prompts"] == 2
+    assert (stats["chunks_included"], stats["chunks_truncated"], stats["chunks_dropped"]) == (3, 1, 1)
+    assert stats["max_prompt_tokens"] <= 403
+    assert stats["prompt_tokens"] > stats["context_tokens"] > 0